@@ -11,6 +11,7 @@ import time
 import threading
 from pathlib import Path
 from datetime import datetime
+from typing import Dict, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from collectors.google_places import GooglePlacesCollector
 from db_manager import DatabaseManager
@@ -92,76 +93,66 @@ def collect_single_resort(resort_config, db_manager):
         return resort_report, 'failed'
 
 
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description='雪场联系信息采集工具')
-    parser.add_argument(
-        '--resort-id',
-        type=int,
-        help='只采集指定 ID 的雪场'
-    )
-    parser.add_argument(
-        '--resort-slug',
-        type=str,
-        help='只采集指定 slug 的雪场'
-    )
-    parser.add_argument(
-        '--config',
-        default='resorts_config.json',
-        help='配置文件路径 (默认: resorts_config.json)'
-    )
-    parser.add_argument(
-        '--limit',
-        type=int,
-        help='限制采集数量'
-    )
-    
-    args = parser.parse_args()
+def run(limit: Optional[int] = None, resort_id: Optional[int] = None,
+        resort_slug: Optional[str] = None, config: str = 'resorts_config.json',
+        db_manager: Optional[DatabaseManager] = None) -> Optional[Dict]:
+    """
+    采集雪场联系信息（命令行和 Lambda 共用的入口）
     
+    Args:
+        limit: 限制采集数量
+        resort_id: 只采集指定 ID 的雪场
+        resort_slug: 只采集指定 slug 的雪场
+        config: 配置文件路径
+        db_manager: 复用已有的数据库管理器（如 Lambda 模块级实例）；不传则新建并在结束时关闭
+        
+    Returns:
+        报告数据，配置/数据库错误时返回 None
+    """
     print("\n" + "=" * 80)
     print("📇 雪场联系信息采集系统 (Google Places API)")
     print("=" * 80)
     print()
     
     # 加载配置
-    config_file = Path(args.config)
+    config_file = Path(config)
     if not config_file.exists():
-        print(f"[ERROR] 错误: 找不到配置文件 {args.config}")
-        return
+        print(f"[ERROR] 错误: 找不到配置文件 {config}")
+        return None
     
     with open(config_file, 'r', encoding='utf-8') as f:
-        config = json.load(f)
-    
-    resorts = config.get('resorts', [])
+        resorts = json.load(f).get('resorts', [])
     
     # 筛选雪场
-    if args.resort_id:
-        resorts = [r for r in resorts if r.get('id') == args.resort_id]
+    if resort_id:
+        resorts = [r for r in resorts if r.get('id') == resort_id]
         if not resorts:
-            print(f"[ERROR] 错误: 找不到 ID 为 {args.resort_id} 的雪场")
-            return
-    elif args.resort_slug:
-        resorts = [r for r in resorts if r.get('slug') == args.resort_slug]
+            print(f"[ERROR] 错误: 找不到 ID 为 {resort_id} 的雪场")
+            return None
+    elif resort_slug:
+        resorts = [r for r in resorts if r.get('slug') == resort_slug]
         if not resorts:
-            print(f"[ERROR] 错误: 找不到 slug 为 {args.resort_slug} 的雪场")
-            return
+            print(f"[ERROR] 错误: 找不到 slug 为 {resort_slug} 的雪场")
+            return None
     else:
         # 只采集启用的雪场
         resorts = [r for r in resorts if r.get('enabled', False)]
     
     # 限制数量
-    if args.limit:
-        resorts = resorts[:args.limit]
+    if limit:
+        resorts = resorts[:limit]
     
     print(f"准备采集 {len(resorts)} 个雪场的联系信息")
     print()
     
     # 初始化数据库管理器
-    try:
-        db_manager = DatabaseManager()
-    except Exception as e:
-        print(f"[ERROR] 数据库连接失败: {e}")
-        return
+    owns_db_manager = db_manager is None
+    if owns_db_manager:
+        try:
+            db_manager = DatabaseManager()
+        except Exception as e:
+            print(f"[ERROR] 数据库连接失败: {e}")
+            return None
     
     # 采集数据
     success_count = 0
@@ -245,8 +236,39 @@ def main():
     print("=" * 80)
     print()
     
-    # 关闭数据库连接
-    db_manager.close()
+    # 关闭数据库连接（外部传入的由调用方管理）
+    if owns_db_manager:
+        db_manager.close()
+    
+    return report_data
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='雪场联系信息采集工具')
+    parser.add_argument(
+        '--resort-id',
+        type=int,
+        help='只采集指定 ID 的雪场'
+    )
+    parser.add_argument(
+        '--resort-slug',
+        type=str,
+        help='只采集指定 slug 的雪场'
+    )
+    parser.add_argument(
+        '--config',
+        default='resorts_config.json',
+        help='配置文件路径 (默认: resorts_config.json)'
+    )
+    parser.add_argument(
+        '--limit',
+        type=int,
+        help='限制采集数量'
+    )
+    
+    args = parser.parse_args()
+    run(**vars(args))
 
 
 if __name__ == '__main__':
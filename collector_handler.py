@@ -77,7 +77,7 @@ def lambda_handler(event, context):
             resorts_to_collect = resorts_to_collect[:limit]
         
         print(f"开始采集 {len(resorts_to_collect)} 个雪场（并发）")
-        results = manager.collect_all(enabled_only=True, failure_tracker=failure_tracker, max_workers=10)
+        results = manager.collect_all(enabled_only=True, failure_tracker=failure_tracker)
         
         print(f"✅ 采集完成: {len(results)}/{len(resorts_to_collect)}")
         
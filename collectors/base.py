@@ -9,13 +9,42 @@ from abc import ABC, abstractmethod
 from typing import Dict, Optional
 from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import random
+import asyncio
+import threading
+
+
+def create_session(pool_maxsize: int = 16) -> requests.Session:
+    """
+    创建带连接池的 HTTP Session（keep-alive，同一主机的后续请求复用 TCP/TLS 连接）
+    
+    重试由 fetch_with_retry 负责，这里不挂 urllib3 Retry
+    
+    Args:
+        pool_maxsize: 每个主机的最大连接数（应不小于并发线程数）
+        
+    Returns:
+        Session 对象
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class BaseCollector(ABC):
     """采集器基类"""
     
+    # 所有采集器实例共享的 Session（并发采集时跨线程复用连接）
+    _SESSION = create_session()
+    
+    # 收到 HTTP 429 的累计次数（用于评估并发数是否过高）
+    rate_limited_count = 0
+    _rate_limited_lock = threading.Lock()
+    
     def __init__(self, resort_config: Dict):
         """
         初始化采集器
@@ -73,7 +102,8 @@ class BaseCollector(ABC):
         delay = random.uniform(min_seconds, max_seconds)
         time.sleep(delay)
     
-    def fetch_with_retry(self, url: str, max_retries: int = 3, timeout: int = 10) -> Optional[requests.Response]:
+    def fetch_with_retry(self, url: str, max_retries: int = 3, timeout: int = 10,
+                         max_bytes: Optional[int] = None) -> Optional[requests.Response]:
         """
         带重试机制的 HTTP 请求
         
@@ -81,23 +111,33 @@ class BaseCollector(ABC):
             url: 请求 URL
             max_retries: 最大重试次数
             timeout: 超时时间（秒）
+            max_bytes: 响应体大小上限（字节），超过则放弃该响应，避免异常大的响应占满 Lambda 内存
             
         Returns:
             Response 对象，失败返回 None
         """
         for attempt in range(max_retries):
             try:
-                response = requests.get(
+                response = self._SESSION.get(
                     url,
                     headers=self.get_headers(),
-                    timeout=timeout
+                    timeout=timeout,
+                    stream=max_bytes is not None
                 )
                 
                 if response.status_code == 200:
+                    if max_bytes is not None and not self._read_limited(response, max_bytes):
+                        return None
                     return response
-                elif response.status_code == 404:
+                
+                response.close()
+                if response.status_code == 404:
                     self.log('ERROR', f'HTTP 404')
                     return None
+                elif response.status_code == 429:
+                    with BaseCollector._rate_limited_lock:
+                        BaseCollector.rate_limited_count += 1
+                    self.log('WARNING', f'HTTP 429 (速率限制), 尝试 {attempt + 1}/{max_retries}')
                 else:
                     self.log('WARNING', f'HTTP {response.status_code}, 尝试 {attempt + 1}/{max_retries}')
                     
@@ -116,4 +156,94 @@ class BaseCollector(ABC):
         
         self.log('ERROR', f'达到最大重试次数 ({max_retries}), 采集失败')
         return None
-
+    
+    async def fetch_with_retry_async(self, client, url: str, max_retries: int = 3, timeout: int = 10,
+                                     max_bytes: Optional[int] = None) -> Optional[bytes]:
+        """
+        fetch_with_retry 的异步版本（httpx.AsyncClient），重试和 429 计数逻辑保持一致
+        
+        Args:
+            client: httpx.AsyncClient
+            url: 请求 URL
+            max_retries: 最大重试次数
+            timeout: 超时时间（秒）
+            max_bytes: 响应体大小上限（字节）
+            
+        Returns:
+            响应体，失败返回 None
+        """
+        import httpx
+        
+        for attempt in range(max_retries):
+            try:
+                async with client.stream('GET', url, headers=self.get_headers(), timeout=timeout) as response:
+                    if response.status_code == 200:
+                        declared = int(response.headers.get('Content-Length') or 0)
+                        if max_bytes is not None and declared > max_bytes:
+                            self.log('ERROR', f'响应过大: Content-Length={declared} 超过上限 {max_bytes}')
+                            return None
+                        
+                        body = bytearray()
+                        async for chunk in response.aiter_bytes(64 * 1024):
+                            body += chunk
+                            if max_bytes is not None and len(body) > max_bytes:
+                                self.log('ERROR', f'响应过大: 已读取 {len(body)} 字节，超过上限 {max_bytes}')
+                                return None
+                        return bytes(body)
+                    
+                    if response.status_code == 404:
+                        self.log('ERROR', f'HTTP 404')
+                        return None
+                    elif response.status_code == 429:
+                        with BaseCollector._rate_limited_lock:
+                            BaseCollector.rate_limited_count += 1
+                        self.log('WARNING', f'HTTP 429 (速率限制), 尝试 {attempt + 1}/{max_retries}')
+                    else:
+                        self.log('WARNING', f'HTTP {response.status_code}, 尝试 {attempt + 1}/{max_retries}')
+                    
+            except httpx.TimeoutException:
+                self.log('WARNING', f'请求超时, 尝试 {attempt + 1}/{max_retries}')
+            except httpx.TransportError:
+                self.log('WARNING', f'连接错误, 尝试 {attempt + 1}/{max_retries}')
+            except httpx.HTTPError as e:
+                self.log('WARNING', f'请求失败: {str(e)[:50]}, 尝试 {attempt + 1}/{max_retries}')
+            
+            # 如果不是最后一次尝试，等待后重试（不阻塞事件循环）
+            if attempt < max_retries - 1:
+                wait_time = (attempt + 1) * 2  # 递增等待时间：2s, 4s, 6s
+                self.log('INFO', f'等待 {wait_time} 秒后重试...')
+                await asyncio.sleep(wait_time)
+        
+        self.log('ERROR', f'达到最大重试次数 ({max_retries}), 采集失败')
+        return None
+    
+    def _read_limited(self, response: requests.Response, max_bytes: int) -> bool:
+        """
+        读取流式响应体，超过上限时中止
+        
+        先检查 Content-Length，再边读边计数（分块传输时没有 Content-Length）
+        
+        Args:
+            response: stream=True 的响应
+            max_bytes: 响应体大小上限（字节）
+            
+        Returns:
+            是否在上限内读取完成（完成后 response.content 可正常使用）
+        """
+        declared = int(response.headers.get('Content-Length') or 0)
+        if declared > max_bytes:
+            self.log('ERROR', f'响应过大: Content-Length={declared} 超过上限 {max_bytes}')
+            response.close()
+            return False
+        
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body += chunk
+            if len(body) > max_bytes:
+                self.log('ERROR', f'响应过大: 已读取 {len(body)} 字节，超过上限 {max_bytes}')
+                response.close()
+                return False
+        
+        # 与 requests 自身读取 content 的方式一致，之后 response.json() / .content 直接使用
+        response._content = bytes(body)
+        return True
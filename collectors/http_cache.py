@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP 响应文件缓存
+开发时反复运行采集/测试脚本，同一个请求在 TTL 内直接读取本地文件，不重复消耗 API 配额
+"""
+
+import os
+import time
+import hashlib
+import threading
+import orjson
+from pathlib import Path
+from typing import Optional, Dict
+
+# 缓存目录（可通过 HTTP_CACHE_DIR 指定）
+CACHE_DIR = Path(os.getenv('HTTP_CACHE_DIR', '.cache'))
+
+
+def cache_path(url: str, prefix: str = 'http') -> Path:
+    """
+    获取 URL 对应的缓存文件路径
+    
+    Args:
+        url: 完整请求 URL（包含查询参数）
+        prefix: 缓存文件名前缀
+    
+    Returns:
+        缓存文件路径
+    """
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return CACHE_DIR / f"{prefix}_{digest}.json"
+
+
+def load(url: str, ttl_seconds: int, prefix: str = 'http') -> Optional[Dict]:
+    """
+    读取未过期的缓存
+    
+    Args:
+        url: 完整请求 URL
+        ttl_seconds: 缓存有效期（秒）
+        prefix: 缓存文件名前缀
+    
+    Returns:
+        缓存的 JSON 数据，不存在、已过期或损坏时返回 None
+    """
+    path = cache_path(url, prefix)
+    try:
+        if path.stat().st_mtime + ttl_seconds < time.time():
+            return None
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def store(url: str, data: Dict, prefix: str = 'http'):
+    """
+    写入缓存（先写临时文件再替换，避免并发线程读到半个文件）
+    
+    Args:
+        url: 完整请求 URL
+        data: JSON 数据
+        prefix: 缓存文件名前缀
+    """
+    path = cache_path(url, prefix)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️  写入缓存失败: {e}")
@@ -5,11 +5,28 @@ Open-Meteo 天气数据采集器
 提供天气预报、Freezing Level 等补充数据
 """
 
+import bisect
+import random
+import asyncio
+import orjson
 import requests
 from typing import Optional, Dict, List
-from .base import BaseCollector
+from .base import BaseCollector, create_session
+from . import http_cache
 from config import Config
 
+# numpy 可选：雪道采集 Lambda 只用到 OSM 采集器，不打包 numpy；
+# 未安装时 interpolate_batch 不可用，DataNormalizer 逐小时走标量插值
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# 气压层及其对应的大致海拔（米），按海拔升序，两者下标一一对应
+PRESSURE_KEYS = ('1000hPa', '925hPa', '850hPa', '700hPa', '500hPa')
+PRESSURE_ALT = (110.0, 750.0, 1500.0, 3000.0, 5500.0)
+
 
 class OpenMeteoCollector(BaseCollector):
     """Open-Meteo 天气采集器"""
@@ -18,16 +35,27 @@ class OpenMeteoCollector(BaseCollector):
     API_BASE_URL_FREE = "https://api.open-meteo.com/v1/forecast"
     API_BASE_URL_PAID = "https://customer-api.open-meteo.com/v1/forecast"
     
-    def collect(self) -> Optional[Dict]:
+    # Open-Meteo 专用 Session：所有雪场都请求同一个主机，连接池要覆盖全部并发线程
+    _SESSION = create_session(pool_maxsize=32)
+    
+    # 请求范围和响应大小上限（防止误配的大范围查询占满 Lambda 内存）
+    FORECAST_HOURS = 96
+    MAX_FORECAST_HOURS = 168
+    MAX_RESPONSE_BYTES = 5_000_000
+    
+    # 批量请求时每个请求包含的坐标数（collect_many）
+    BATCH_SIZE = 50
+    
+    def build_url(self) -> Optional[str]:
         """
-        从 Open-Meteo API 采集天气数据
+        构建 Open-Meteo 请求 URL
         
-        优化策略：
-        - Hourly 数据：采集 4 天（96小时，显示 72 小时足够）
+        优化策略（单个请求）：
+        - Hourly 数据：从当前小时起 96 小时（显示 72 小时足够）
         - Daily 数据：采集 8 天（确保完整的 7 天预报）
         
         Returns:
-            原始 JSON 数据或 None
+            完整请求 URL，缺少经纬度时返回 None
         """
         # 从配置中获取经纬度
         lat = self.resort_config.get('lat')
@@ -37,27 +65,37 @@ class OpenMeteoCollector(BaseCollector):
             self.log('ERROR', '缺少经纬度信息')
             return None
         
-        # 确定 API 端点和 Key
-        api_key = Config.OPENMETEO_API_KEY
-        if api_key:
-            api_url = self.API_BASE_URL_PAID
+        if Config.OPENMETEO_API_KEY:
             self.log('INFO', f'开始采集天气数据 (lat={lat}, lon={lon}) [使用付费 API]')
         else:
-            api_url = self.API_BASE_URL_FREE
             self.log('INFO', f'开始采集天气数据 (lat={lat}, lon={lon}) [使用免费 API]')
-            # 免费 API 需要延迟以避免速率限制
-            self.random_delay(1.0, 2.0)
         
-        # 方案：发送一个请求，但 hourly 只采集 4 天，daily 采集 8 天
-        # Open-Meteo API 支持 forecast_days 参数，但 hourly 和 daily 会使用相同的天数
-        # 因此需要发送两个请求分别获取
+        return self._query_url(lat, lon)
+    
+    @classmethod
+    def _query_url(cls, latitude, longitude) -> str:
+        """
+        构建请求 URL（单个坐标和批量请求共用）
+        
+        Args:
+            latitude: 纬度（批量请求时为逗号分隔的多个纬度）
+            longitude: 经度（批量请求时为逗号分隔的多个经度）
+        
+        Returns:
+            完整请求 URL
+        """
+        # 确定 API 端点和 Key
+        api_key = Config.OPENMETEO_API_KEY
+        api_url = cls.API_BASE_URL_PAID if api_key else cls.API_BASE_URL_FREE
+        
+        # 一个请求同时获取 hourly 和 daily：
+        # forecast_days=8 决定 daily 的天数，forecast_hours=96 把 hourly 限制为从当前小时起的 96 小时
         
         import urllib.parse
         
-        # 请求 1：获取 4 天的 hourly 数据
-        params_hourly = {
-            'latitude': lat,
-            'longitude': lon,
+        params = {
+            'latitude': latitude,
+            'longitude': longitude,
             'hourly': [
                 'temperature_2m',
                 'apparent_temperature',  # 体感温度
@@ -75,33 +113,6 @@ class OpenMeteoCollector(BaseCollector):
                 'temperature_700hPa',   # ~3000m
                 'temperature_500hPa',   # ~5500m
             ],
-            'temperature_unit': 'celsius',
-            'windspeed_unit': 'kmh',
-            'precipitation_unit': 'mm',
-            'timezone': 'auto',
-            'forecast_days': 4  # 4天 hourly 数据（96小时）
-        }
-        
-        if api_key:
-            params_hourly['apikey'] = api_key
-        
-        query_hourly = urllib.parse.urlencode(params_hourly, doseq=True)
-        url_hourly = f"{api_url}?{query_hourly}"
-        
-        response_hourly = self.fetch_with_retry(url_hourly, max_retries=3, timeout=30)
-        if not response_hourly:
-            return None
-        
-        try:
-            data_hourly = response_hourly.json()
-        except ValueError as e:
-            self.log('ERROR', f'Hourly 数据 JSON 解析失败: {e}')
-            return None
-        
-        # 请求 2：获取 8 天的 daily 数据
-        params_daily = {
-            'latitude': lat,
-            'longitude': lon,
             'daily': [
                 'sunrise',
                 'sunset',
@@ -115,98 +126,267 @@ class OpenMeteoCollector(BaseCollector):
             'windspeed_unit': 'kmh',
             'precipitation_unit': 'mm',
             'timezone': 'auto',
-            'forecast_days': 8  # 8天 daily 数据
+            'forecast_days': 8,  # 8天 daily 数据
+            'forecast_hours': min(cls.FORECAST_HOURS, cls.MAX_FORECAST_HOURS)  # hourly 数据（从当前小时开始）
         }
         
         if api_key:
-            params_daily['apikey'] = api_key
+            params['apikey'] = api_key
         
-        query_daily = urllib.parse.urlencode(params_daily, doseq=True)
-        url_daily = f"{api_url}?{query_daily}"
+        query = urllib.parse.urlencode(params, doseq=True)
+        return f"{api_url}?{query}"
+    
+    def _load_cached(self, url: str) -> Optional[Dict]:
+        """读取本地文件缓存（OPENMETEO_CACHE_TTL > 0 时启用，开发时避免重复消耗 API 配额）"""
+        if Config.OPENMETEO_CACHE_TTL <= 0:
+            return None
+        data = http_cache.load(url, Config.OPENMETEO_CACHE_TTL, prefix='openmeteo')
+        if data is not None:
+            self.log('INFO', '天气数据命中本地缓存')
+        return data
+    
+    def _parse_content(self, url: str, content: bytes) -> Optional[Dict]:
+        """
+        解析响应体并写入缓存
         
-        response_daily = self.fetch_with_retry(url_daily, max_retries=3, timeout=30)
-        if not response_daily:
-            # 如果 daily 数据失败，仍然返回 hourly 数据
-            self.log('WARNING', 'Daily 数据采集失败，仅返回 hourly 数据')
-            return data_hourly
+        Args:
+            url: 请求 URL（缓存键）
+            content: 响应体
         
+        Returns:
+            原始 JSON 数据或 None
+        """
         try:
-            data_daily = response_daily.json()
+            data = orjson.loads(content)
         except ValueError as e:
-            self.log('ERROR', f'Daily 数据 JSON 解析失败: {e}')
-            # 返回 hourly 数据
-            return data_hourly
-        
-        # 合并两个响应
-        # 将 daily 数据合并到 hourly 数据中
-        if 'daily' in data_daily:
-            data_hourly['daily'] = data_daily['daily']
-            data_hourly['daily_units'] = data_daily.get('daily_units', {})
-        
-        self.log('INFO', '天气数据采集成功 (4天 hourly + 8天 daily)')
-        return data_hourly
+            self.log('ERROR', f'天气数据 JSON 解析失败: {e}')
+            return None
+        
+        if Config.OPENMETEO_CACHE_TTL > 0:
+            http_cache.store(url, data, prefix='openmeteo')
+        
+        self.log('INFO', '天气数据采集成功 (96小时 hourly + 8天 daily)')
+        return data
+    
+    def collect(self) -> Optional[Dict]:
+        """
+        从 Open-Meteo API 采集天气数据
+        
+        Returns:
+            原始 JSON 数据或 None
+        """
+        url = self.build_url()
+        if url is None:
+            return None
+        
+        data = self._load_cached(url)
+        if data is not None:
+            return data
+        
+        if not Config.OPENMETEO_API_KEY:
+            # 免费 API 需要延迟以避免速率限制
+            self.random_delay(1.0, 2.0)
+        
+        response = self.fetch_with_retry(url, max_retries=3, timeout=30, max_bytes=self.MAX_RESPONSE_BYTES)
+        if not response:
+            return None
+        
+        return self._parse_content(url, response.content)
+    
+    async def collect_async(self, client) -> Optional[Dict]:
+        """
+        collect() 的异步版本（用于 ResortDataManager.collect_all_async）
+        
+        Args:
+            client: httpx.AsyncClient（所有雪场共享，HTTP/2 下复用同一个连接）
+        
+        Returns:
+            原始 JSON 数据或 None
+        """
+        url = self.build_url()
+        if url is None:
+            return None
+        
+        data = self._load_cached(url)
+        if data is not None:
+            return data
+        
+        if not Config.OPENMETEO_API_KEY:
+            # 免费 API 需要延迟以避免速率限制（不阻塞事件循环）
+            await asyncio.sleep(random.uniform(1.0, 2.0))
+        
+        content = await self.fetch_with_retry_async(
+            client, url, max_retries=3, timeout=30, max_bytes=self.MAX_RESPONSE_BYTES
+        )
+        if content is None:
+            return None
+        
+        return self._parse_content(url, content)
+    
+    @classmethod
+    def collect_many(cls, resorts: List[Dict], batch_size: Optional[int] = None) -> Dict[int, Dict]:
+        """
+        批量采集多个雪场的天气数据（每批一个多坐标请求）
+        
+        Open-Meteo 支持 latitude=a,b,c&longitude=x,y,z，按坐标顺序返回结果数组，
+        与逐个请求相比握手和请求次数减少到 1/batch_size
+        
+        Args:
+            resorts: 雪场配置列表
+            batch_size: 每个请求包含的雪场数（默认 BATCH_SIZE）
+        
+        Returns:
+            {resort_id: 原始 JSON 数据}，缺少经纬度或所在批次失败的雪场不在结果中
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        located = [r for r in resorts if r.get('lat') and r.get('lon')]
+        results = {}
+        
+        for start in range(0, len(located), batch_size):
+            chunk = located[start:start + batch_size]
+            collector = cls({'name': f'批量天气 {start + 1}-{start + len(chunk)}'})
+            url = cls._query_url(
+                ','.join(str(r['lat']) for r in chunk),
+                ','.join(str(r['lon']) for r in chunk)
+            )
+            
+            data = collector._load_cached(url)
+            if data is None:
+                collector.log('INFO', f'开始批量采集天气数据 ({len(chunk)} 个雪场)')
+                
+                if not Config.OPENMETEO_API_KEY:
+                    # 免费 API 需要延迟以避免速率限制
+                    collector.random_delay(1.0, 2.0)
+                
+                response = collector.fetch_with_retry(
+                    url, max_retries=3, timeout=60, max_bytes=cls.MAX_RESPONSE_BYTES * len(chunk)
+                )
+                if not response:
+                    continue
+                
+                data = collector._parse_content(url, response.content)
+                if data is None:
+                    continue
+            
+            # 只有一个坐标时 API 返回单个对象而不是数组
+            if isinstance(data, dict):
+                data = [data]
+            
+            if len(data) != len(chunk):
+                collector.log('WARNING', f'返回 {len(data)} 个结果，与请求的 {len(chunk)} 个坐标不一致，跳过该批次')
+                continue
+            
+            for resort, location_data in zip(chunk, data):
+                results[resort.get('id')] = location_data
+        
+        return results
     
     @staticmethod
     def interpolate_temperature_at_elevation(
         target_elevation: float,
-        pressure_temps: Dict[str, float]
+        pressure_temps
     ) -> Optional[float]:
         """
         根据气压层温度数据插值计算指定海拔的温度
         
         Args:
             target_elevation: 目标海拔（米）
-            pressure_temps: 气压层温度字典，例如:
-                {
-                    '1000hPa': 20.0,  # ~110m
-                    '925hPa': 18.0,   # ~750m
-                    '850hPa': 15.0,   # ~1500m
-                    '700hPa': 8.0,    # ~3000m
-                    '500hPa': -5.0,   # ~5500m
-                }
+            pressure_temps: 按 PRESSURE_KEYS 顺序排列的气压层温度（列表或 1-D 数组，缺失值为 None/NaN），例如:
+                [20.0, 18.0, 15.0, 8.0, -5.0]  # 1000/925/850/700/500hPa
+                也兼容 {'1000hPa': 20.0, ...} 形式的字典
         
         Returns:
             插值后的温度（摄氏度）或 None
         """
-        # 气压层对应的大致海拔（米）
-        pressure_elevations = {
-            '1000hPa': 110,
-            '925hPa': 750,
-            '850hPa': 1500,
-            '700hPa': 3000,
-            '500hPa': 5500,
-        }
+        if isinstance(pressure_temps, dict):
+            pressure_temps = [pressure_temps.get(key) for key in PRESSURE_KEYS]
         
-        # 构建有效的海拔-温度对列表
-        elevation_temp_pairs = []
-        for pressure, elevation in pressure_elevations.items():
-            if pressure in pressure_temps and pressure_temps[pressure] is not None:
-                elevation_temp_pairs.append((elevation, pressure_temps[pressure]))
+        # 有效的海拔/温度（PRESSURE_ALT 已按海拔升序，无需排序）
+        elevations = []
+        temps = []
+        for elevation, temp in zip(PRESSURE_ALT, pressure_temps):
+            if temp is not None and temp == temp:  # 排除 None 和 NaN
+                elevations.append(elevation)
+                temps.append(temp)
         
-        if len(elevation_temp_pairs) < 2:
+        if len(elevations) < 2:
             return None
         
-        # 按海拔排序
-        elevation_temp_pairs.sort(key=lambda x: x[0])
+        return OpenMeteoCollector._interpolate_sorted(target_elevation, elevations, temps)
+    
+    @staticmethod
+    def _interpolate_sorted(
+        target_elevation: float,
+        elevations: List[float],
+        temps: List[float]
+    ) -> float:
+        """
+        插值内核：在按海拔升序的有效层上线性插值
+        
+        二分查找目标海拔所在区间；低于最低点或高于最高点时落在两端的区间，即用两端两点线性外推
+        
+        Args:
+            target_elevation: 目标海拔（米）
+            elevations: 升序海拔列表（至少两个）
+            temps: 与 elevations 对应的温度列表
+        
+        Returns:
+            插值后的温度（摄氏度）
+        """
+        i = bisect.bisect_right(elevations, target_elevation) - 1
+        i = min(max(i, 0), len(elevations) - 2)
+        
+        ratio = (target_elevation - elevations[i]) / (elevations[i + 1] - elevations[i])
+        return temps[i] + ratio * (temps[i + 1] - temps[i])
+    
+    @staticmethod
+    def interpolate_batch(
+        elev_targets: 'np.ndarray',
+        pressure_alts: 'np.ndarray',
+        temps: 'np.ndarray'
+    ) -> 'np.ndarray':
+        """
+        批量计算多个时刻、多个海拔的温度（interpolate_temperature_at_elevation 的向量化版本，需要 numpy）
+        
+        所有气压层都有值的时刻一次性向量化计算（区间内线性插值，区间外用两端的两点外推）；
+        缺少部分气压层的时刻逐行只用有效层计算，与标量版本的处理方式一致
         
-        # 如果目标海拔低于最低点或高于最高点，使用外推
-        elevations = [e for e, _ in elevation_temp_pairs]
-        temps = [t for _, t in elevation_temp_pairs]
+        Args:
+            elev_targets: 目标海拔数组，形状 (E,)
+            pressure_alts: 各气压层对应的海拔，形状 (L,)
+            temps: 气压层温度矩阵，形状 (H, L)，缺失值为 NaN
         
-        if target_elevation <= elevations[0]:
-            # 低于最低点，使用最低两点外推
-            return temps[0] + (temps[1] - temps[0]) / (elevations[1] - elevations[0]) * (target_elevation - elevations[0])
+        Returns:
+            温度矩阵，形状 (H, E)，无法计算的位置为 NaN
+        """
+        elev_targets = np.asarray(elev_targets, dtype=np.float64)
+        pressure_alts = np.asarray(pressure_alts, dtype=np.float64)
+        temps = np.asarray(temps, dtype=np.float64).reshape(-1, len(pressure_alts))
         
-        if target_elevation >= elevations[-1]:
-            # 高于最高点，使用最高两点外推
-            return temps[-1] + (temps[-1] - temps[-2]) / (elevations[-1] - elevations[-2]) * (target_elevation - elevations[-1])
+        order = np.argsort(pressure_alts)
+        alts = pressure_alts[order]
+        temps = np.ascontiguousarray(temps[:, order])
         
-        # 在范围内，找到目标海拔所在的区间并线性插值
-        for i in range(len(elevations) - 1):
-            if elevations[i] <= target_elevation <= elevations[i + 1]:
-                # 线性插值
-                ratio = (target_elevation - elevations[i]) / (elevations[i + 1] - elevations[i])
-                return temps[i] + ratio * (temps[i + 1] - temps[i])
+        result = np.full((temps.shape[0], len(elev_targets)), np.nan)
+        if len(alts) < 2:
+            return result
         
-        return None
-
+        # 每个目标海拔所在的区间（超出范围时落在两端的区间，即线性外推）
+        idx = np.clip(np.searchsorted(alts, elev_targets, side='right') - 1, 0, len(alts) - 2)
+        ratio = (elev_targets - alts[idx]) / (alts[idx + 1] - alts[idx])
+        
+        complete = ~np.isnan(temps).any(axis=1)
+        lower = temps[complete][:, idx]
+        upper = temps[complete][:, idx + 1]
+        result[complete] = lower + ratio * (upper - lower)
+        
+        # 缺少气压层的时刻：使用剩余的有效层逐行计算
+        for row in np.flatnonzero(~complete):
+            valid = ~np.isnan(temps[row])
+            if valid.sum() < 2:
+                continue
+            result[row] = OpenMeteoCollector.interpolate_batch(
+                elev_targets, alts[valid], temps[row, valid]
+            )[0]
+        
+        return result
@@ -41,6 +41,8 @@ class Config:
     
     # Open-Meteo API 配置
     OPENMETEO_API_KEY = os.getenv('OPENMETEO_API_KEY', '')  # 付费 API Key（可选）
+    OPENMETEO_MAX_WORKERS = int(os.getenv('OPENMETEO_MAX_WORKERS', 10))  # 并发采集线程数（用 test_concurrent_collection.py --tune 选择）
+    OPENMETEO_CACHE_TTL = int(os.getenv('OPENMETEO_CACHE_TTL', 0))  # 本地响应缓存秒数（0 = 不缓存，开发时可设为 900）
     
     @classmethod
     def display(cls):
@@ -53,6 +55,7 @@ class Config:
         print(f"缓存 TTL: {cls.CACHE_TTL} 秒")
         print(f"采集间隔: {cls.DATA_COLLECTION_INTERVAL} 秒")
         print(f"Open-Meteo API Key: {'已设置' if cls.OPENMETEO_API_KEY else '未设置（使用免费版）'}")
+        print(f"并发采集线程数: {cls.OPENMETEO_MAX_WORKERS}")
         print("=" * 80)
 
 
@@ -5,7 +5,7 @@
 import json
 import redis
 from datetime import datetime
-from sqlalchemy import create_engine, desc
+from sqlalchemy import create_engine, desc, insert
 from sqlalchemy.orm import sessionmaker, scoped_session
 from typing import List, Dict, Optional
 import threading
@@ -50,20 +50,47 @@ def calculate_status_by_opening_date(opening_date_str: str, original_status: str
         return original_status
 
 
+# 进程级共享的 engine（连接池）
+# 同一进程内（包括 Lambda 热启动的后续调用）的所有 DatabaseManager 复用同一个连接池，
+# 建表检查也只执行一次
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine():
+    """
+    获取共享的 engine，首次调用时创建连接池并建表
+    
+    Returns:
+        SQLAlchemy Engine
+    """
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                engine = create_engine(
+                    Config.DATABASE_URL, 
+                    echo=False, 
+                    pool_pre_ping=True,
+                    pool_size=20,  # 增加连接池大小以支持并发
+                    max_overflow=10,
+                    pool_recycle=1800  # 30 分钟回收连接，避免使用被服务端/NAT 断开的空闲连接
+                )
+                Base.metadata.create_all(engine)
+                _ENGINE = engine
+                
+                print(f"[OK] 数据库连接成功: {Config.POSTGRES_HOST}:{Config.POSTGRES_PORT}/{Config.POSTGRES_DB}")
+                print(f"[OK] 线程安全模式已启用 (pool_size=20)")
+    return _ENGINE
+
+
 class DatabaseManager:
     """数据库和缓存管理器（线程安全）"""
     
     def __init__(self):
         """初始化数据库连接和Redis"""
         # PostgreSQL - 使用 scoped_session 实现线程安全
-        self.engine = create_engine(
-            Config.DATABASE_URL, 
-            echo=False, 
-            pool_pre_ping=True,
-            pool_size=20,  # 增加连接池大小以支持并发
-            max_overflow=10
-        )
-        Base.metadata.create_all(self.engine)
+        self.engine = get_engine()
         session_factory = sessionmaker(bind=self.engine)
         self.Session = scoped_session(session_factory)  # 线程安全的 session
         
@@ -71,9 +98,7 @@ class DatabaseManager:
         self.redis_client = redis.from_url(Config.REDIS_URL, decode_responses=True)
         self.cache_ttl = Config.CACHE_TTL
         
-        print(f"[OK] 数据库连接成功: {Config.POSTGRES_HOST}:{Config.POSTGRES_PORT}/{Config.POSTGRES_DB}")
         print(f"[OK] Redis 连接成功: {Config.REDIS_HOST}:{Config.REDIS_PORT}")
-        print(f"[OK] 线程安全模式已启用 (pool_size=20)")
     
     @property
     def session(self):
@@ -544,25 +569,28 @@ class DatabaseManager:
             # 2. 删除该雪场的旧雪道数据
             self.session.query(ResortTrail).filter_by(resort_id=resort_id).delete()
             
-            # 3. 保存新雪道数据
+            # 3. 保存新雪道数据（一次 bulk INSERT，而不是逐条 session.add）
             trails = trails_data.get('trails', [])
             
-            for trail in trails:
-                trail_obj = ResortTrail(
-                    resort_id=resort_id,
-                    osm_id=trail.get('osm_id'),
-                    osm_type=trail.get('osm_type'),
-                    name=trail.get('name'),
-                    difficulty=trail.get('difficulty'),
-                    piste_type=trail.get('piste_type'),
-                    geometry=trail.get('geometry'),
-                    length_meters=trail.get('length_meters'),
-                    lit=trail.get('lit'),
-                    grooming=trail.get('grooming'),
-                    width=trail.get('width'),
-                    ref=trail.get('ref')
-                )
-                self.session.add(trail_obj)
+            trail_rows = [
+                {
+                    'resort_id': resort_id,
+                    'osm_id': trail.get('osm_id'),
+                    'osm_type': trail.get('osm_type'),
+                    'name': trail.get('name'),
+                    'difficulty': trail.get('difficulty'),
+                    'piste_type': trail.get('piste_type'),
+                    'geometry': trail.get('geometry'),
+                    'length_meters': trail.get('length_meters'),
+                    'lit': trail.get('lit'),
+                    'grooming': trail.get('grooming'),
+                    'width': trail.get('width'),
+                    'ref': trail.get('ref')
+                }
+                for trail in trails
+            ]
+            if trail_rows:
+                self.session.execute(insert(ResortTrail), trail_rows)
             
             # 4. 提交事务
             self.session.commit()
@@ -778,6 +806,7 @@ class DatabaseManager:
         
         timestamp = datetime.now()
         
+        rows = []
         for cam in webcams:
             # 解析 last_updated 时间
             last_updated = None
@@ -787,20 +816,23 @@ class DatabaseManager:
                 except:
                     pass
             
-            webcam = ResortWebcam(
-                resort_id=resort_id,
-                timestamp=timestamp,
-                webcam_uuid=cam.get('webcam_uuid'),
-                title=cam.get('title'),
-                image_url=cam.get('image_url'),
-                thumbnail_url=cam.get('thumbnail_url'),
-                video_stream_url=cam.get('video_stream_url'),
-                webcam_type=cam.get('webcam_type', 0),
-                is_featured=cam.get('is_featured', False),
-                last_updated=last_updated,
-                source=source
-            )
-            session.add(webcam)
+            rows.append({
+                'resort_id': resort_id,
+                'timestamp': timestamp,
+                'webcam_uuid': cam.get('webcam_uuid'),
+                'title': cam.get('title'),
+                'image_url': cam.get('image_url'),
+                'thumbnail_url': cam.get('thumbnail_url'),
+                'video_stream_url': cam.get('video_stream_url'),
+                'webcam_type': cam.get('webcam_type', 0),
+                'is_featured': cam.get('is_featured', False),
+                'last_updated': last_updated,
+                'source': source
+            })
+        
+        # 一次 bulk INSERT（SQLAlchemy 2.0 在 psycopg2 上自动合并为多行 VALUES）
+        if rows:
+            session.execute(insert(ResortWebcam), rows)
     
     def _invalidate_trails_cache(self, resort_id: int, resort_slug: str):
         """清除雪道缓存"""
@@ -962,7 +994,7 @@ class DatabaseManager:
             session.close()
     
     def close(self):
-        """关闭连接"""
+        """关闭 session 和 Redis（数据库连接归还连接池，供后续 DatabaseManager 复用）"""
         self.session.close()
         self.redis_client.close()
 
@@ -29,6 +29,7 @@ cp models.py package/
 cp config.py package/
 cp resorts_config.json package/
 cp trails_report_html.py package/
+cp html_minify.py package/
 cp -r collectors package/
 
 # 安装依赖 - 使用 Docker 和 Amazon Linux 2
@@ -33,6 +33,7 @@ cp models.py trails_lambda_package/
 cp config.py trails_lambda_package/
 cp resorts_config.json trails_lambda_package/
 cp trails_report_html.py trails_lambda_package/
+cp html_minify.py trails_lambda_package/
 
 echo "   ├─ 复制 collectors 模块..."
 cp -r collectors trails_lambda_package/
@@ -73,6 +74,7 @@ async-timeout>=4.0.0
 python-dotenv>=1.0.0
 firebase-admin>=6.2.0
 typing-extensions>=4.0.0
+orjson>=3.9.0
 EOF
 
     # 构建并运行容器来安装依赖
@@ -90,7 +92,7 @@ else
     echo "   ⚠️  未找到 Docker，尝试使用本地 pip..."
     pip3 install --upgrade \
         requests beautifulsoup4 html5lib sqlalchemy redis async-timeout \
-        python-dotenv firebase-admin typing-extensions psycopg2-binary \
+        python-dotenv firebase-admin typing-extensions psycopg2-binary orjson \
         -t trails_lambda_package/ --quiet
 fi
 
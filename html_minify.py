@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML 压缩工具（报告页面共用）
+"""
+
+import re
+
+# 压缩时原样保留的区块（脚本中的 // 注释依赖换行，pre/textarea 的空白有意义）
+_PROTECTED_RE = re.compile(r'(<script\b.*?</script>|<pre\b.*?</pre>|<textarea\b.*?</textarea>)', re.S | re.I)
+_BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+_WHITESPACE_RE = re.compile(r'\s{2,}')
+
+
+def minify_html(html: str) -> str:
+    """
+    压缩 HTML：去掉标签之间的缩进和换行，其余连续空白合并为一个空格
+    
+    标签之间的空白直接去掉（报告页面的行内元素都在 flex/grid 容器中，空白节点不影响排版）；
+    <script>/<pre>/<textarea> 内容保持不变
+    
+    Args:
+        html: HTML 文本（也可以是带 {占位符} 的模板）
+    
+    Returns:
+        压缩后的 HTML
+    """
+    parts = _PROTECTED_RE.split(html)
+    # split 带捕获组：偶数下标是普通 HTML，奇数下标是受保护的区块
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE_RE.sub(' ', _BETWEEN_TAGS_RE.sub('><', parts[i]))
+    return ''.join(parts)
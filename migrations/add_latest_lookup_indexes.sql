@@ -0,0 +1,21 @@
+-- 为时序表添加 (resort_id, timestamp DESC) 复合索引
+-- 执行日期: 2026-10-17
+--
+-- API 读取每个雪场的最新雪况/天气：
+--   WHERE resort_id = ? ORDER BY timestamp DESC LIMIT 1
+-- 单列索引需要先取出该雪场的全部历史再排序，复合索引可以直接定位最新一行
+--
+-- 注意：CREATE INDEX CONCURRENTLY 不能在事务中执行（psql 逐条执行即可，不要加 -1 / BEGIN）
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resort_conditions_resort_ts
+    ON resort_conditions (resort_id, timestamp DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_resort_weather_resort_ts
+    ON resort_weather (resort_id, timestamp DESC);
+
+-- 验证索引是否创建成功
+SELECT 
+    indexname, 
+    indexdef
+FROM pg_indexes
+WHERE indexname IN ('idx_resort_conditions_resort_ts', 'idx_resort_weather_resort_ts');
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 # Database Models - SQLAlchemy ORM definitions
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON, Text, Boolean, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -213,6 +213,12 @@ class ResortWebcam(Base):
         return f"<ResortWebcam(resort_id={self.resort_id}, title='{self.title}', video={bool(self.video_stream_url)})>"
 
 
+# 查询雪场最新一条时序数据（WHERE resort_id = ? ORDER BY timestamp DESC LIMIT 1）用的复合索引
+# 已有数据库通过 migrations/add_latest_lookup_indexes.sql 创建
+Index('idx_resort_conditions_resort_ts', ResortCondition.resort_id, ResortCondition.timestamp.desc())
+Index('idx_resort_weather_resort_ts', ResortWeather.resort_id, ResortWeather.timestamp.desc())
+
+
 # 数据库初始化函数
 def init_db(database_url):
     """
@@ -617,7 +617,7 @@ def generate_html_report(json_report_file: str, html_output_file: str):
     # 写入文件
     Path(html_output_file).parent.mkdir(parents=True, exist_ok=True)
     
-    with open(html_output_file, 'w', encoding='utf-8') as f:
+    with open(html_output_file, 'w', encoding='utf-8', newline='\n') as f:
         f.write(html_content)
     
     print(f"[OK] HTML 报告已生成: {html_output_file}")
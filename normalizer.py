@@ -7,7 +7,13 @@
 
 from typing import Dict, Optional
 from datetime import datetime
-from collectors.openmeteo import OpenMeteoCollector
+from collectors.openmeteo import OpenMeteoCollector, PRESSURE_KEYS, PRESSURE_ALT
+
+# numpy 可选：未安装时分层温度逐小时走标量插值
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class DataNormalizer:
@@ -228,13 +234,6 @@ class DataNormalizer:
         current_winddirection = winddirections[0] if winddirections else None
         current_freezing_level = freezing_levels[0] if freezing_levels else None
         
-        # 气压层温度数据
-        temp_1000hPa = hourly.get('temperature_1000hPa', [])
-        temp_925hPa = hourly.get('temperature_925hPa', [])
-        temp_850hPa = hourly.get('temperature_850hPa', [])
-        temp_700hPa = hourly.get('temperature_700hPa', [])
-        temp_500hPa = hourly.get('temperature_500hPa', [])
-        
         # 计算当前山脚、山腰、山顶的温度
         elevation_min = resort_config.get('elevation_min')
         elevation_max = resort_config.get('elevation_max')
@@ -242,33 +241,49 @@ class DataNormalizer:
         current_temp_mid = None
         current_temp_summit = None
         
+        times = hourly.get('time', [])
+        
+        # 分层温度 [山脚, 山腰, 山顶]，每小时一行（第 0 行即当前时刻）
+        layered_temps = None
+        
         if elevation_min and elevation_max:
-            # 当前时刻的气压层温度
-            current_pressure_temps = {
-                '1000hPa': temp_1000hPa[0] if temp_1000hPa else None,
-                '925hPa': temp_925hPa[0] if temp_925hPa else None,
-                '850hPa': temp_850hPa[0] if temp_850hPa else None,
-                '700hPa': temp_700hPa[0] if temp_700hPa else None,
-                '500hPa': temp_500hPa[0] if temp_500hPa else None,
-            }
+            elevation_mid = (elevation_min + elevation_max) / 2
             
-            # 插值计算，添加合理性检查
-            temp_base = OpenMeteoCollector.interpolate_temperature_at_elevation(
-                elevation_min, current_pressure_temps
-            )
-            # 验证温度范围 (-50°C 到 50°C)
-            current_temp_base = temp_base if (temp_base is not None and -50 < temp_base < 50) else None
+            n_hours = max(min(80, len(times)), 1)
+            pressure_series = [hourly.get(f'temperature_{key}', []) for key in PRESSURE_KEYS]
             
-            elevation_mid = (elevation_min + elevation_max) / 2
-            temp_mid = OpenMeteoCollector.interpolate_temperature_at_elevation(
-                elevation_mid, current_pressure_temps
-            )
-            current_temp_mid = temp_mid if (temp_mid is not None and -50 < temp_mid < 50) else None
+            if np is not None:
+                # 气压层温度矩阵 (小时, 气压层)，缺失值为 NaN
+                pressure_matrix = np.full((n_hours, len(pressure_series)), np.nan)
+                for j, series in enumerate(pressure_series):
+                    values = np.array(series[:n_hours], dtype=np.float64)
+                    pressure_matrix[:len(values), j] = values
+                
+                # 所有小时 × 3 个海拔一次性插值
+                interpolated = OpenMeteoCollector.interpolate_batch(
+                    np.array([elevation_min, elevation_mid, elevation_max], dtype=np.float64),
+                    PRESSURE_ALT,
+                    pressure_matrix
+                )
+                
+                # 验证温度范围 (-50°C 到 50°C)，超出范围或无法计算时为 None
+                in_range = (interpolated > -50) & (interpolated < 50)
+                layered_temps = [
+                    [t if ok else None for t, ok in zip(row, row_ok)]
+                    for row, row_ok in zip(interpolated.tolist(), in_range.tolist())
+                ]
+            else:
+                # 未安装 numpy：逐小时标量插值，结果与向量化版本一致
+                layered_temps = []
+                for hour in range(n_hours):
+                    pressure_temps = [series[hour] if hour < len(series) else None for series in pressure_series]
+                    row = []
+                    for elevation in (elevation_min, elevation_mid, elevation_max):
+                        t = OpenMeteoCollector.interpolate_temperature_at_elevation(elevation, pressure_temps)
+                        row.append(t if t is not None and -50 < t < 50 else None)
+                    layered_temps.append(row)
             
-            temp_summit = OpenMeteoCollector.interpolate_temperature_at_elevation(
-                elevation_max, current_pressure_temps
-            )
-            current_temp_summit = temp_summit if (temp_summit is not None and -50 < temp_summit < 50) else None
+            current_temp_base, current_temp_mid, current_temp_summit = layered_temps[0]
         
         # 未来24小时平均冰冻高度
         avg_freezing_level_24h = None
@@ -291,9 +306,6 @@ class DataNormalizer:
             precipitation_24h = round(sum(precipitations[:24]), 1)  # mm
         
         # 未来80小时的详细数据（从当前小时开始）
-        hourly_forecast = []
-        times = hourly.get('time', [])
-        
         # Open-Meteo API 配置说明：
         # - 使用 timezone='auto' 参数时，API 返回雪场当地时区的时间
         # - 返回的时间格式为 "2024-11-23T19:00"（无时区标记，表示当地时间）
@@ -301,47 +313,38 @@ class DataNormalizer:
         # - 因此我们直接从索引 0 开始取数据即可，无需手动查找起始索引
         
         # 从索引 0 开始，取 80 小时数据（约 3.3 天，比 72 小时多一点）
-        for i in range(min(80, len(times))):
-            forecast_item = {
-                'time': times[i] if i < len(times) else None,
-                'temperature': temperatures[i] if i < len(temperatures) else None,
-                'apparent_temperature': apparent_temperatures[i] if i < len(apparent_temperatures) else None,  # 体感温度
-                'humidity': humidities[i] if i < len(humidities) else None,
-                'windspeed': windspeeds[i] if i < len(windspeeds) else None,
-                'winddirection': winddirections[i] if i < len(winddirections) else None,
-                'freezing_level': freezing_levels[i] if i < len(freezing_levels) else None,
-                'weather_code': weathercodes[i] if i < len(weathercodes) else None,
-                'snowfall': snowfalls[i] if i < len(snowfalls) else None,  # cm
-                'precipitation': precipitations[i] if i < len(precipitations) else None,  # mm
-            }
-            
-            # 添加分层温度（如果有海拔数据）
-            if elevation_min and elevation_max:
-                pressure_temps_hour = {
-                    '1000hPa': temp_1000hPa[i] if i < len(temp_1000hPa) else None,
-                    '925hPa': temp_925hPa[i] if i < len(temp_925hPa) else None,
-                    '850hPa': temp_850hPa[i] if i < len(temp_850hPa) else None,
-                    '700hPa': temp_700hPa[i] if i < len(temp_700hPa) else None,
-                    '500hPa': temp_500hPa[i] if i < len(temp_500hPa) else None,
-                }
-                
-                # 计算分层温度并验证
-                temp_b = OpenMeteoCollector.interpolate_temperature_at_elevation(
-                    elevation_min, pressure_temps_hour
-                )
-                forecast_item['temp_base'] = temp_b if (temp_b is not None and -50 < temp_b < 50) else None
-                
-                temp_m = OpenMeteoCollector.interpolate_temperature_at_elevation(
-                    elevation_mid, pressure_temps_hour
-                )
-                forecast_item['temp_mid'] = temp_m if (temp_m is not None and -50 < temp_m < 50) else None
-                
-                temp_s = OpenMeteoCollector.interpolate_temperature_at_elevation(
-                    elevation_max, pressure_temps_hour
-                )
-                forecast_item['temp_summit'] = temp_s if (temp_s is not None and -50 < temp_s < 50) else None
-            
-            hourly_forecast.append(forecast_item)
+        # 按列处理：每个字段切片并补齐一次，再逐行 zip 成字典（不在循环里逐字段做越界判断）
+        forecast_hours = min(80, len(times))
+        
+        def column(values):
+            """取前 forecast_hours 个值，不足的补 None"""
+            col = list(values[:forecast_hours])
+            return col + [None] * (forecast_hours - len(col))
+        
+        hourly_columns = {
+            'time': times,
+            'temperature': temperatures,
+            'apparent_temperature': apparent_temperatures,  # 体感温度
+            'humidity': humidities,
+            'windspeed': windspeeds,
+            'winddirection': winddirections,
+            'freezing_level': freezing_levels,
+            'weather_code': weathercodes,
+            'snowfall': snowfalls,  # cm
+            'precipitation': precipitations,  # mm
+        }
+        
+        # 添加分层温度（如果有海拔数据）
+        if layered_temps is not None:
+            hourly_columns['temp_base'] = [row[0] for row in layered_temps]
+            hourly_columns['temp_mid'] = [row[1] for row in layered_temps]
+            hourly_columns['temp_summit'] = [row[2] for row in layered_temps]
+        
+        keys = tuple(hourly_columns)
+        hourly_forecast = [
+            dict(zip(keys, row))
+            for row in zip(*(column(values) for values in hourly_columns.values()))
+        ]
         
         # 今天的天气数据
         today_data = {}
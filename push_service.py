@@ -97,6 +97,64 @@ def delete_invalid_token(token: str):
         print(f"❌ 删除失效 token 失败: {e}")
 
 
+# FCM multicast 单次请求最多 500 个 token
+MULTICAST_MAX_TOKENS = 500
+
+
+def _stringify_data(data: Optional[Dict]) -> Dict[str, str]:
+    """Convert all data values to strings (FCM requirement)"""
+    string_data = {}
+    if data:
+        for key, value in data.items():
+            if value is not None:
+                string_data[key] = str(value) if not isinstance(value, str) else value
+    return string_data
+
+
+def _apns_config(title: str, body: str) -> messaging.APNSConfig:
+    """iOS specific"""
+    return messaging.APNSConfig(
+        headers={'apns-priority': '10'},
+        payload=messaging.APNSPayload(
+            aps=messaging.Aps(
+                alert=messaging.ApsAlert(
+                    title=title,
+                    body=body,
+                ),
+                badge=1,
+                sound='default',
+            ),
+        ),
+    )
+
+
+def _android_config() -> messaging.AndroidConfig:
+    """Android specific"""
+    return messaging.AndroidConfig(
+        priority='high',
+        notification=messaging.AndroidNotification(
+            icon='ic_notification',
+            color='#8B5CF6',
+            sound='default',
+            channel_id='high_importance_channel',
+        ),
+    )
+
+
+def _is_invalid_token_error(error_msg: str) -> bool:
+    """Check if token is invalid and should be deleted"""
+    if 'not a valid FCM registration token' in error_msg:
+        print(f"   → Token is invalid or expired")
+        return True
+    if 'Requested entity was not found' in error_msg:
+        print(f"   → Token was not found (may have been unregistered)")
+        return True
+    if 'SenderId mismatch' in error_msg:
+        print(f"   → Token belongs to different Firebase project")
+        return True
+    return False
+
+
 def send_push_notification(
     tokens: List[str],
     title: str,
@@ -122,12 +180,7 @@ def send_push_notification(
     
     initialize_firebase()
     
-    # Convert all data values to strings (FCM requirement)
-    string_data = {}
-    if data:
-        for key, value in data.items():
-            if value is not None:
-                string_data[key] = str(value) if not isinstance(value, str) else value
+    string_data = _stringify_data(data)
     
     # Send to each token individually (compatible with older firebase-admin versions)
     success_count = 0
@@ -145,30 +198,8 @@ def send_push_notification(
                 ),
                 data=string_data,
                 token=token,
-                # iOS specific
-                apns=messaging.APNSConfig(
-                    headers={'apns-priority': '10'},
-                    payload=messaging.APNSPayload(
-                        aps=messaging.Aps(
-                            alert=messaging.ApsAlert(
-                                title=title,
-                                body=body,
-                            ),
-                            badge=1,
-                            sound='default',
-                        ),
-                    ),
-                ),
-                # Android specific
-                android=messaging.AndroidConfig(
-                    priority='high',
-                    notification=messaging.AndroidNotification(
-                        icon='ic_notification',
-                        color='#8B5CF6',
-                        sound='default',
-                        channel_id='high_importance_channel',
-                    ),
-                ),
+                apns=_apns_config(title, body),
+                android=_android_config(),
             )
             
             # Send message
@@ -182,21 +213,8 @@ def send_push_notification(
             failure_count += 1
             failed_tokens.append(token)
             
-            # Check if token is invalid and should be deleted
-            should_delete = False
-            
-            if 'not a valid FCM registration token' in error_msg:
-                print(f"   → Token is invalid or expired")
-                should_delete = True
-            elif 'Requested entity was not found' in error_msg:
-                print(f"   → Token was not found (may have been unregistered)")
-                should_delete = True
-            elif 'SenderId mismatch' in error_msg:
-                print(f"   → Token belongs to different Firebase project")
-                should_delete = True
-            
             # Delete invalid token from database
-            if should_delete:
+            if _is_invalid_token_error(error_msg):
                 delete_invalid_token(token)
     
     print(f"✅ Successfully sent {success_count} messages")
@@ -210,6 +228,76 @@ def send_push_notification(
     }
 
 
+def send_multicast_notification(
+    tokens: List[str],
+    title: str,
+    body: str,
+    data: Optional[Dict] = None,
+    image_url: Optional[str] = None
+) -> Dict:
+    """
+    同一条通知发给多个设备：每 500 个 token 构建一个 MulticastMessage，一次请求发送
+    
+    Args:
+        tokens: List of FCM tokens
+        title: Notification title
+        body: Notification body
+        data: Additional data payload
+        image_url: Optional image URL
+    
+    Returns:
+        Dict with success_count, failure_count and results
+        (results 与 tokens 一一对应，表示每个 token 是否发送成功)
+    """
+    if not tokens:
+        return {'success_count': 0, 'failure_count': 0, 'results': []}
+    
+    initialize_firebase()
+    
+    # 同一批次内的通知内容相同，只构建一次
+    notification = messaging.Notification(title=title, body=body, image=image_url)
+    string_data = _stringify_data(data)
+    apns = _apns_config(title, body)
+    android = _android_config()
+    
+    results = []
+    for i in range(0, len(tokens), MULTICAST_MAX_TOKENS):
+        chunk = tokens[i:i + MULTICAST_MAX_TOKENS]
+        message = messaging.MulticastMessage(
+            tokens=chunk,
+            notification=notification,
+            data=string_data,
+            apns=apns,
+            android=android,
+        )
+        
+        try:
+            batch_response = messaging.send_each_for_multicast(message)
+        except Exception as e:
+            print(f"❌ Multicast failed for {len(chunk)} tokens: {e}")
+            results.extend([False] * len(chunk))
+            continue
+        
+        for token, response in zip(chunk, batch_response.responses):
+            results.append(response.success)
+            if not response.success:
+                error_msg = str(response.exception)
+                print(f"❌ Failed to send to token {token[:20]}...: {error_msg}")
+                if _is_invalid_token_error(error_msg):
+                    delete_invalid_token(token)
+    
+    success_count = sum(results)
+    failure_count = len(results) - success_count
+    
+    print(f"✅ Multicast sent {success_count}/{len(tokens)} messages")
+    
+    return {
+        'success_count': success_count,
+        'failure_count': failure_count,
+        'results': results,
+    }
+
+
 # Specific notification types
 
 def send_carpool_application_notification(owner_user_id: str, applicant_name: str, carpool_info: Dict):
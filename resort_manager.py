@@ -7,6 +7,7 @@
 
 import json
 import os
+import asyncio
 from typing import List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
@@ -16,6 +17,7 @@ import threading
 from collectors import MtnPowderCollector, OnTheSnowCollector, OpenMeteoCollector
 from normalizer import DataNormalizer
 from db_manager import DatabaseManager
+from config import Config
 
 
 class ResortDataManager:
@@ -88,13 +90,38 @@ class ResortDataManager:
         else:
             raise ValueError(f"不支持的数据源: {data_source}")
     
-    def collect_resort_data(self, resort_config: Dict, include_weather: bool = True) -> Optional[Dict]:
+    def collect_resort_data(self, resort_config: Dict, include_weather: bool = True,
+                            weather_raw_data: Optional[Dict] = None) -> Optional[Dict]:
         """
         采集单个雪场数据（支持多数据源）
         
         Args:
             resort_config: 雪场配置
             include_weather: 是否同时采集天气数据（包括 freezing level）
+            weather_raw_data: 已批量获取的 Open-Meteo 原始数据（为 None 时单独请求）
+            
+        Returns:
+            标准化后的数据或 None
+        """
+        normalized_data = self._collect_main_data(resort_config)
+        
+        if normalized_data is None:
+            return None
+        
+        # 3. 同时采集天气数据
+        if include_weather:
+            if weather_raw_data is None:
+                weather_raw_data = OpenMeteoCollector(resort_config).collect()
+            self._merge_weather(resort_config, normalized_data, weather_raw_data)
+        
+        return normalized_data
+    
+    def _collect_main_data(self, resort_config: Dict) -> Optional[Dict]:
+        """
+        采集主数据源和 OnTheSnow 补充数据（不含天气）
+        
+        Args:
+            resort_config: 雪场配置
             
         Returns:
             标准化后的数据或 None
@@ -146,51 +173,75 @@ class ResortDataManager:
                 # OnTheSnow 采集失败不影响主数据
                 print(f"[WARNING] OnTheSnow 补充数据采集失败: {e}")
         
-        # 3. 同时采集天气数据
-        if include_weather:
-            weather_collector = OpenMeteoCollector(resort_config)
-            weather_raw_data = weather_collector.collect()
+        return normalized_data
+    
+    def _merge_weather(self, resort_config: Dict, normalized_data: Dict, weather_raw_data: Optional[Dict]):
+        """
+        标准化天气数据并合并到雪场数据中
+        
+        Args:
+            resort_config: 雪场配置
+            normalized_data: 主数据源标准化后的数据（原地修改）
+            weather_raw_data: Open-Meteo 原始数据（采集失败时为 None）
+        """
+        if weather_raw_data:
+            weather_normalized = DataNormalizer.normalize(
+                resort_config, 
+                weather_raw_data, 
+                'openmeteo'
+            )
             
-            if weather_raw_data:
-                weather_normalized = DataNormalizer.normalize(
-                    resort_config, 
-                    weather_raw_data, 
-                    'openmeteo'
-                )
+            # 合并天气数据到雪场数据中
+            if weather_normalized:
+                normalized_data['weather'] = {
+                    'current': weather_normalized.get('current'),
+                    'freezing_level_current': weather_normalized.get('freezing_level_current'),
+                    'freezing_level_24h_avg': weather_normalized.get('freezing_level_24h_avg'),
+                    'temp_base': weather_normalized.get('temp_base'),
+                    'temp_mid': weather_normalized.get('temp_mid'),
+                    'temp_summit': weather_normalized.get('temp_summit'),
+                    'today': weather_normalized.get('today'),
+                    'hourly_forecast': weather_normalized.get('hourly_forecast'),
+                    'forecast_7d': weather_normalized.get('forecast_7d'),
+                    'avg_windspeed_24h': weather_normalized.get('avg_windspeed_24h'),
+                    'last_update': weather_normalized.get('last_update')
+                }
                 
-                # 合并天气数据到雪场数据中
-                if weather_normalized:
-                    normalized_data['weather'] = {
-                        'current': weather_normalized.get('current'),
-                        'freezing_level_current': weather_normalized.get('freezing_level_current'),
-                        'freezing_level_24h_avg': weather_normalized.get('freezing_level_24h_avg'),
-                        'temp_base': weather_normalized.get('temp_base'),
-                        'temp_mid': weather_normalized.get('temp_mid'),
-                        'temp_summit': weather_normalized.get('temp_summit'),
-                        'today': weather_normalized.get('today'),
-                        'hourly_forecast': weather_normalized.get('hourly_forecast'),
-                        'forecast_7d': weather_normalized.get('forecast_7d'),
-                        'avg_windspeed_24h': weather_normalized.get('avg_windspeed_24h'),
-                        'last_update': weather_normalized.get('last_update')
+                # 添加雪场海拔信息（如果配置中有）
+                if 'elevation_min' in resort_config and 'elevation_max' in resort_config:
+                    normalized_data['elevation'] = {
+                        'min': resort_config.get('elevation_min'),
+                        'max': resort_config.get('elevation_max'),
+                        'vertical': resort_config.get('elevation_max', 0) - resort_config.get('elevation_min', 0)
                     }
-                    
-                    # 添加雪场海拔信息（如果配置中有）
-                    if 'elevation_min' in resort_config and 'elevation_max' in resort_config:
-                        normalized_data['elevation'] = {
-                            'min': resort_config.get('elevation_min'),
-                            'max': resort_config.get('elevation_max'),
-                            'vertical': resort_config.get('elevation_max', 0) - resort_config.get('elevation_min', 0)
-                        }
-        
-        return normalized_data
     
-    def _collect_single_resort(self, resort_config: Dict, failure_tracker=None) -> tuple[Optional[Dict], Optional[str]]:
+    def _collect_single_resort(self, resort_config: Dict, failure_tracker=None,
+                               weather_raw_data: Optional[Dict] = None) -> tuple[Optional[Dict], Optional[str]]:
         """
         采集单个雪场数据（用于并发）
         
         Args:
             resort_config: 雪场配置
             failure_tracker: 失败追踪器（可选）
+            weather_raw_data: 已批量获取的 Open-Meteo 原始数据（可选）
+            
+        Returns:
+            (数据, 错误信息) 元组
+        """
+        try:
+            data = self.collect_resort_data(resort_config, weather_raw_data=weather_raw_data)
+            return self._handle_resort_result(resort_config, data, failure_tracker)
+        except Exception as e:
+            return self._handle_resort_error(resort_config, e, failure_tracker)
+    
+    def _handle_resort_result(self, resort_config: Dict, data: Optional[Dict], failure_tracker=None) -> tuple[Optional[Dict], Optional[str]]:
+        """
+        保存采集结果并记录失败（线程池和 asyncio 两种采集方式共用）
+        
+        Args:
+            resort_config: 雪场配置
+            data: 采集到的数据（None 表示无数据）
+            failure_tracker: 失败追踪器（可选）
             
         Returns:
             (数据, 错误信息) 元组
@@ -198,98 +249,114 @@ class ResortDataManager:
         resort_name = resort_config.get('name')
         resort_id = resort_config.get('id')
         
-        try:
-            data = self.collect_resort_data(resort_config)
-            
-            if data:
-                # 保存到数据库
-                if self.use_db and self.db_manager:
-                    success = self.db_manager.save_resort_data(resort_config, data)
-                    if success:
-                        with self.print_lock:
-                            print(f"   ✅ {resort_name} - 成功（已存入数据库）")
-                        return (data, None)
-                    else:
-                        # 数据库保存失败，视为采集失败
-                        with self.print_lock:
-                            print(f"   ❌ {resort_name} - 失败（数据库保存失败）")
-                        
-                        # 记录失败
-                        if failure_tracker:
-                            url = resort_config.get('source_url', 'N/A')
-                            failure_tracker.add_failure(
-                                resort_id=resort_id,
-                                resort_name=resort_name,
-                                error_type='DATABASE_SAVE_FAILED',
-                                error_message='数据采集成功但数据库保存失败',
-                                url=url
-                            )
-                        
-                        return (None, 'DATABASE_SAVE_FAILED')
-                else:
-                    # 无数据库连接，仅返回数据用于文件保存
+        if data:
+            # 保存到数据库
+            if self.use_db and self.db_manager:
+                success = self.db_manager.save_resort_data(resort_config, data)
+                if success:
                     with self.print_lock:
-                        print(f"   ✅ {resort_name} - 成功")
+                        print(f"   ✅ {resort_name} - 成功（已存入数据库）")
                     return (data, None)
+                else:
+                    # 数据库保存失败，视为采集失败
+                    with self.print_lock:
+                        print(f"   ❌ {resort_name} - 失败（数据库保存失败）")
+                    
+                    # 记录失败
+                    if failure_tracker:
+                        url = resort_config.get('source_url', 'N/A')
+                        failure_tracker.add_failure(
+                            resort_id=resort_id,
+                            resort_name=resort_name,
+                            error_type='DATABASE_SAVE_FAILED',
+                            error_message='数据采集成功但数据库保存失败',
+                            url=url
+                        )
+                    
+                    return (None, 'DATABASE_SAVE_FAILED')
             else:
+                # 无数据库连接，仅返回数据用于文件保存
                 with self.print_lock:
-                    print(f"   ❌ {resort_name} - 失败（无数据）")
-                
-                # 记录失败
-                if failure_tracker:
-                    url = resort_config.get('source_url', 'N/A')
-                    failure_tracker.add_failure(
-                        resort_id=resort_id,
-                        resort_name=resort_name,
-                        error_type='NO_DATA',
-                        error_message='采集器返回空数据',
-                        url=url
-                    )
-                
-                return (None, 'NO_DATA')
-                
-        except Exception as e:
-            error_str = str(e)
+                    print(f"   ✅ {resort_name} - 成功")
+                return (data, None)
+        else:
             with self.print_lock:
-                print(f"   ❌ {resort_name} - 错误: {error_str[:100]}")
+                print(f"   ❌ {resort_name} - 失败（无数据）")
             
             # 记录失败
             if failure_tracker:
                 url = resort_config.get('source_url', 'N/A')
-                
-                # 判断错误类型
-                error_type = 'UNKNOWN'
-                if '404' in error_str or 'Not Found' in error_str:
-                    error_type = 'HTTP_404'
-                elif 'timeout' in error_str.lower() or 'timed out' in error_str.lower():
-                    error_type = 'TIMEOUT'
-                elif 'connection' in error_str.lower():
-                    error_type = 'CONNECTION_ERROR'
-                elif 'json' in error_str.lower():
-                    error_type = 'JSON_ERROR'
-                
                 failure_tracker.add_failure(
                     resort_id=resort_id,
                     resort_name=resort_name,
-                    error_type=error_type,
-                    error_message=error_str[:200],  # 限制长度
+                    error_type='NO_DATA',
+                    error_message='采集器返回空数据',
                     url=url
                 )
             
-            return (None, error_str)
+            return (None, 'NO_DATA')
+    
+    def _handle_resort_error(self, resort_config: Dict, e: Exception, failure_tracker=None) -> tuple[Optional[Dict], Optional[str]]:
+        """
+        记录采集异常（线程池和 asyncio 两种采集方式共用）
+        
+        Args:
+            resort_config: 雪场配置
+            e: 采集过程中抛出的异常
+            failure_tracker: 失败追踪器（可选）
+            
+        Returns:
+            (None, 错误信息) 元组
+        """
+        resort_name = resort_config.get('name')
+        resort_id = resort_config.get('id')
+        
+        error_str = str(e)
+        with self.print_lock:
+            print(f"   ❌ {resort_name} - 错误: {error_str[:100]}")
+        
+        # 记录失败
+        if failure_tracker:
+            url = resort_config.get('source_url', 'N/A')
+            
+            # 判断错误类型
+            error_type = 'UNKNOWN'
+            if '404' in error_str or 'Not Found' in error_str:
+                error_type = 'HTTP_404'
+            elif 'timeout' in error_str.lower() or 'timed out' in error_str.lower():
+                error_type = 'TIMEOUT'
+            elif 'connection' in error_str.lower():
+                error_type = 'CONNECTION_ERROR'
+            elif 'json' in error_str.lower():
+                error_type = 'JSON_ERROR'
+            
+            failure_tracker.add_failure(
+                resort_id=resort_id,
+                resort_name=resort_name,
+                error_type=error_type,
+                error_message=error_str[:200],  # 限制长度
+                url=url
+            )
+        
+        return (None, error_str)
     
-    def collect_all(self, enabled_only: bool = True, failure_tracker=None, max_workers: int = 10) -> List[Dict]:
+    def collect_all(self, enabled_only: bool = True, failure_tracker=None, max_workers: Optional[int] = None,
+                    batch_weather: bool = False) -> List[Dict]:
         """
         采集所有雪场数据（使用多线程并发）
         
         Args:
             enabled_only: 是否只采集已启用的雪场
             failure_tracker: 失败追踪器（可选）
-            max_workers: 最大并发线程数（默认10，平衡速度和稳定性）
+            max_workers: 最大并发线程数（默认取 Config.OPENMETEO_MAX_WORKERS，平衡速度和稳定性）
+            batch_weather: 是否先用多坐标请求批量获取天气数据（OpenMeteoCollector.collect_many）
             
         Returns:
             标准化数据列表
         """
+        if max_workers is None:
+            max_workers = Config.OPENMETEO_MAX_WORKERS
+        
         results = []
         
         resorts_to_collect = [
@@ -301,11 +368,18 @@ class ResortDataManager:
         print("=" * 70)
         print()
         
+        weather_by_id = self._prefetch_weather(resorts_to_collect) if batch_weather else {}
+        
         # 使用线程池并发采集
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # 提交所有任务
             future_to_resort = {
-                executor.submit(self._collect_single_resort, resort_config, failure_tracker): resort_config
+                executor.submit(
+                    self._collect_single_resort,
+                    resort_config,
+                    failure_tracker,
+                    weather_by_id.get(resort_config.get('id'))
+                ): resort_config
                 for resort_config in resorts_to_collect
             }
             
@@ -329,6 +403,130 @@ class ResortDataManager:
         
         return results
     
+    def _prefetch_weather(self, resorts_to_collect: List[Dict]) -> Dict[int, Dict]:
+        """
+        批量获取天气数据（多坐标请求），失败的雪场在采集时单独请求
+        
+        Args:
+            resorts_to_collect: 待采集的雪场配置
+            
+        Returns:
+            {resort_id: Open-Meteo 原始数据}
+        """
+        weather_by_id = OpenMeteoCollector.collect_many(resorts_to_collect)
+        print(f"🌤️  批量天气数据: {len(weather_by_id)}/{len(resorts_to_collect)} 个雪场（其余单独请求）")
+        print()
+        return weather_by_id
+    
+    def collect_all_async(self, enabled_only: bool = True, failure_tracker=None, max_workers: Optional[int] = None,
+                          batch_weather: bool = False) -> List[Dict]:
+        """
+        采集所有雪场数据（asyncio 版本，参数和返回值与 collect_all 相同）
+        
+        Open-Meteo 请求走同一个 httpx.AsyncClient（HTTP/2 多路复用同一个连接）；
+        主数据源采集器（页面抓取）和数据库保存仍是阻塞调用，放到线程中执行
+        
+        Args:
+            enabled_only: 是否只采集已启用的雪场
+            failure_tracker: 失败追踪器（可选）
+            max_workers: 同时采集的雪场数（默认取 Config.OPENMETEO_MAX_WORKERS）
+            batch_weather: 是否先用多坐标请求批量获取天气数据（OpenMeteoCollector.collect_many）
+            
+        Returns:
+            标准化数据列表
+        """
+        if max_workers is None:
+            max_workers = Config.OPENMETEO_MAX_WORKERS
+        
+        resorts_to_collect = [
+            r for r in self.resorts 
+            if not enabled_only or r.get('enabled', False)
+        ]
+        
+        print(f"\n🚀 开始异步采集 {len(resorts_to_collect)} 个雪场的数据（并发 {max_workers}）")
+        print("=" * 70)
+        print()
+        
+        weather_by_id = self._prefetch_weather(resorts_to_collect) if batch_weather else {}
+        
+        results = asyncio.run(self._gather_all(resorts_to_collect, failure_tracker, max_workers, weather_by_id))
+        
+        print()
+        print("=" * 70)
+        print(f"✅ 采集完成: 成功 {len(results)}/{len(resorts_to_collect)}")
+        print()
+        
+        return results
+    
+    async def _gather_all(self, resorts_to_collect: List[Dict], failure_tracker, max_workers: int,
+                          weather_by_id: Dict[int, Dict]) -> List[Dict]:
+        """
+        在一个事件循环中并发采集所有雪场
+        
+        Args:
+            resorts_to_collect: 待采集的雪场配置
+            failure_tracker: 失败追踪器（可选）
+            max_workers: 同时采集的雪场数
+            weather_by_id: 已批量获取的天气数据 {resort_id: 原始数据}
+            
+        Returns:
+            标准化数据列表
+        """
+        import httpx
+        
+        # asyncio.to_thread 使用默认线程池，默认大小 min(32, CPU+4) 在 Lambda 上只有个位数
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_workers))
+        semaphore = asyncio.Semaphore(max_workers)
+        progress = {'completed': 0, 'total': len(resorts_to_collect)}
+        
+        limits = httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        async with httpx.AsyncClient(http2=True, timeout=10, limits=limits) as client:
+            outcomes = await asyncio.gather(*(
+                self._collect_one_async(
+                    client, semaphore, resort_config, failure_tracker, progress,
+                    weather_by_id.get(resort_config.get('id'))
+                )
+                for resort_config in resorts_to_collect
+            ))
+        
+        return [data for data, _ in outcomes if data]
+    
+    async def _collect_one_async(self, client, semaphore: asyncio.Semaphore, resort_config: Dict,
+                                 failure_tracker, progress: Dict,
+                                 weather_raw_data: Optional[Dict] = None) -> tuple[Optional[Dict], Optional[str]]:
+        """
+        异步采集单个雪场数据（与 _collect_single_resort 对应）
+        
+        Args:
+            client: httpx.AsyncClient
+            semaphore: 限制同时采集的雪场数
+            resort_config: 雪场配置
+            failure_tracker: 失败追踪器（可选）
+            progress: 进度计数（所有任务共享）
+            weather_raw_data: 已批量获取的 Open-Meteo 原始数据（为 None 时单独请求）
+            
+        Returns:
+            (数据, 错误信息) 元组
+        """
+        async with semaphore:
+            try:
+                data = await asyncio.to_thread(self._collect_main_data, resort_config)
+                
+                if data is not None:
+                    if weather_raw_data is None:
+                        weather_raw_data = await OpenMeteoCollector(resort_config).collect_async(client)
+                    self._merge_weather(resort_config, data, weather_raw_data)
+                
+                outcome = await asyncio.to_thread(self._handle_resort_result, resort_config, data, failure_tracker)
+            except Exception as e:
+                outcome = self._handle_resort_error(resort_config, e, failure_tracker)
+        
+        progress['completed'] += 1
+        with self.print_lock:
+            print(f"   [{progress['completed']}/{progress['total']}] 已完成")
+        
+        return outcome
+    
     def save_data(self, data: List[Dict], filename: Optional[str] = None):
         """
         保存数据到文件
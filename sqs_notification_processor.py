@@ -8,16 +8,67 @@
 
 import os
 import json
-from typing import Dict, Any, List
-from push_service import (
-    send_push_notification,
-    get_user_tokens,
-    initialize_firebase
-)
+import asyncio
+import logging
+import functools
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Set, Tuple
 import requests
+from aws_lambda_powertools.utilities.batch import (
+    AsyncBatchProcessor,
+    EventType,
+    async_process_partial_response
+)
+from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
+
+# uvloop 可选：未安装（或平台不支持）时退回标准 asyncio 事件循环
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@dataclass(slots=True, frozen=True)
+class NotificationMessage:
+    """推送通知（每条消息只解析一次，之后按属性访问）"""
+    user_id: str
+    notification_type: str
+    title: str
+    body: str
+    data: Dict[str, Any]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'NotificationMessage':
+        """从 SQS 消息体 / webhook record 构建"""
+        return cls(
+            user_id=data.get('user_id'),
+            notification_type=data.get('notification_type'),
+            title=data.get('title'),
+            body=data.get('body'),
+            data=data.get('data', {})
+        )
 
-# 初始化 Firebase
-initialize_firebase()
+
+_FB_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _fb() -> bool:
+    """
+    延迟初始化 Firebase
+    
+    只在第一次真正处理通知时初始化，健康检查或错误路径的冷启动不必加载 firebase_admin
+    （批内消息在多个线程中并发处理，加锁避免重复 initialize_app）
+    """
+    from push_service import initialize_firebase
+    with _FB_LOCK:
+        initialize_firebase()
+    return True
 
 def update_notification_status(queue_id: int, status: str) -> bool:
     """
@@ -54,18 +105,19 @@ def update_notification_status(queue_id: int, status: str) -> bool:
         )
         response.raise_for_status()
         
-        print(f"✅ 更新通知状态: ID={queue_id}, status={status}")
+        logger.info("✅ 更新通知状态: ID=%s, status=%s", queue_id, status)
         return True
         
     except Exception as e:
-        print(f"❌ 更新通知状态失败: {e}")
+        logger.error("❌ 更新通知状态失败: %s", e)
         return False
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda 入口函数 - 支持多种触发方式
     """
-    print(f"📨 收到事件: {json.dumps(event, default=str)[:200]}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("📨 收到事件: %.200s...", json.dumps(event, default=str))
     
     # 判断事件类型
     if 'Records' in event:
@@ -82,34 +134,139 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return handle_direct_call(event, context)
 
 
-def handle_sqs_batch(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """处理 SQS 批量消息"""
-    print(f"📦 处理 SQS 批量消息: {len(event['Records'])} 条")
+def _payload_key(notification: NotificationMessage) -> Tuple[str, str, str]:
+    """相同 title/body/data 的通知可以合并成一个 MulticastMessage"""
+    return (
+        notification.title,
+        notification.body,
+        json.dumps(notification.data, sort_keys=True, default=str)
+    )
+
+
+async def _process_batch(records: List[Dict[str, Any]]) -> Set[str]:
+    """
+    批量处理 SQS 消息
     
-    failed_messages = []
-    success_count = 0
+    1. 并发查询每条消息对应用户的 FCM token
+    2. 按通知内容分组，每组只发一次 multicast（而不是每个用户一次）
+    3. 消息的任一设备发送成功即视为成功
     
-    for record in event['Records']:
-        message_id = record['messageId']
-        
+    Supabase 查询和 FCM 发送都是阻塞调用，放到线程中并发执行
+    
+    Args:
+        records: SQS Records
+    
+    Returns:
+        失败消息的 messageId 集合
+    """
+    from push_service import get_user_tokens, send_multicast_notification
+    
+    failed_ids: Set[str] = set()
+    messages = []
+    for record in records:
         try:
-            body = json.loads(record['body'])
-            if process_notification(body):
-                success_count += 1
-            else:
-                failed_messages.append({"itemIdentifier": message_id})
+            messages.append((record['messageId'], NotificationMessage.from_dict(json.loads(record['body']))))
         except Exception as e:
-            print(f"❌ 处理消息 {message_id} 失败: {e}")
-            failed_messages.append({"itemIdentifier": message_id})
+            logger.error("❌ 解析消息失败: message_id=%s, %s", record.get('messageId'), e)
+            failed_ids.add(record.get('messageId'))
     
-    return {
-        "batchItemFailures": failed_messages
-    }
+    token_results = await asyncio.gather(
+        *[asyncio.to_thread(get_user_tokens, n.user_id) for _, n in messages],
+        return_exceptions=True
+    )
+    
+    # payload key -> (通知, 合并后的 tokens, [(message_id, token 起始下标, 结束下标)])
+    groups: Dict[Tuple[str, str, str], Tuple[NotificationMessage, List[str], List[Tuple[str, int, int]]]] = {}
+    for (message_id, notification), tokens in zip(messages, token_results):
+        if isinstance(tokens, Exception):
+            logger.error("❌ 获取 token 失败: user=%s, %s", notification.user_id, tokens)
+            failed_ids.add(message_id)
+            continue
+        if not tokens:
+            logger.debug("⚠️  用户 %s 没有 FCM token", notification.user_id)
+            continue  # 不算失败
+        
+        _, group_tokens, owners = groups.setdefault(_payload_key(notification), (notification, [], []))
+        owners.append((message_id, len(group_tokens), len(group_tokens) + len(tokens)))
+        group_tokens.extend(tokens)
+    
+    if not groups:
+        return failed_ids
+    
+    _fb()
+    logger.info("📨 %d 条消息合并为 %d 个 multicast", len(messages), len(groups))
+    
+    group_list = list(groups.values())
+    send_results = await asyncio.gather(
+        *[
+            asyncio.to_thread(
+                send_multicast_notification,
+                tokens=group_tokens,
+                title=notification.title,
+                body=notification.body,
+                data=notification.data
+            )
+            for notification, group_tokens, _ in group_list
+        ],
+        return_exceptions=True
+    )
+    
+    for (_, _, owners), result in zip(group_list, send_results):
+        if isinstance(result, Exception):
+            logger.error("❌ multicast 发送失败: %s", result)
+            failed_ids.update(message_id for message_id, _, _ in owners)
+            continue
+        token_ok = result['results']
+        for message_id, start, end in owners:
+            if not any(token_ok[start:end]):
+                failed_ids.add(message_id)
+    
+    return failed_ids
+
+
+class MulticastBatchProcessor(AsyncBatchProcessor):
+    """
+    先把整批消息合并发送，再由 record_handler 逐条汇报结果
+    
+    批内第一条消息的 record_handler 启动 _process_batch，其余消息等待同一个任务，
+    整批只做一次 token 查询和分组 multicast；batchItemFailures 仍由 Powertools 生成
+    """
+    
+    def _prepare(self):
+        super()._prepare()
+        self._batch_task: Optional[asyncio.Future] = None
+    
+    def batch_failures(self) -> asyncio.Future:
+        """整批处理任务（返回失败消息的 messageId 集合）"""
+        if self._batch_task is None:
+            self._batch_task = asyncio.ensure_future(_process_batch(self.records))
+        return self._batch_task
+
+
+processor = MulticastBatchProcessor(event_type=EventType.SQS)
+
+
+async def record_handler(record: SQSRecord) -> None:
+    """汇报单条 SQS 消息的结果，发送失败时抛出异常由 Powertools 计入 batchItemFailures"""
+    if record.message_id in await processor.batch_failures():
+        raise RuntimeError(f"通知发送失败: message_id={record.message_id}")
+
+
+def handle_sqs_batch(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """处理 SQS 批量消息（按通知内容合并 multicast，部分失败只重试失败的消息）"""
+    logger.info("📦 处理 SQS 批量消息: %d 条", len(event['Records']))
+    
+    return async_process_partial_response(
+        event=event,
+        record_handler=record_handler,
+        processor=processor,
+        context=context
+    )
 
 
 def handle_http_request(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """处理 Lambda Function URL 的 HTTP 请求（Supabase Webhook）"""
-    print(f"🌐 处理 HTTP 请求")
+    logger.info("🌐 处理 HTTP 请求")
     
     try:
         # 解析 HTTP body
@@ -119,22 +276,15 @@ def handle_http_request(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             body_str = base64.b64decode(body_str).decode('utf-8')
         
         webhook_data = json.loads(body_str)
-        print(f"📦 Webhook 数据: {json.dumps(webhook_data, default=str)[:300]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📦 Webhook 数据: %.300s", json.dumps(webhook_data, default=str))
         
         # Supabase Webhook 格式: {"type": "INSERT", "table": "...", "record": {...}}
         if webhook_data.get('type') == 'INSERT':
             record = webhook_data.get('record', {})
             queue_id = record.get('id')  # push_notification_queue 的 ID
             
-            notification_data = {
-                'user_id': record.get('user_id'),
-                'notification_type': record.get('notification_type'),
-                'title': record.get('title'),
-                'body': record.get('body'),
-                'data': record.get('data', {})
-            }
-            
-            success = process_notification(notification_data)
+            success = process_notification(NotificationMessage.from_dict(record))
             
             # 更新数据库中的状态
             if queue_id:
@@ -149,7 +299,7 @@ def handle_http_request(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 })
             }
         else:
-            print(f"⚠️  未知的 webhook 类型: {webhook_data.get('type')}")
+            logger.warning("⚠️  未知的 webhook 类型: %s", webhook_data.get('type'))
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
@@ -157,9 +307,7 @@ def handle_http_request(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
             
     except Exception as e:
-        print(f"❌ 处理 HTTP 请求失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ 处理 HTTP 请求失败: %s", e)
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json'},
@@ -170,21 +318,13 @@ def handle_http_request(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
 def handle_supabase_webhook(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """处理 Supabase Webhook"""
-    print(f"🔔 处理 Supabase Webhook")
+    logger.info("🔔 处理 Supabase Webhook")
     
     try:
         # Supabase webhook 格式
         record = event.get('record', {})
         
-        notification_data = {
-            'user_id': record.get('user_id'),
-            'notification_type': record.get('notification_type'),
-            'title': record.get('title'),
-            'body': record.get('body'),
-            'data': record.get('data', {})
-        }
-        
-        success = process_notification(notification_data)
+        success = process_notification(NotificationMessage.from_dict(record))
         
         return {
             'statusCode': 200 if success else 500,
@@ -194,7 +334,7 @@ def handle_supabase_webhook(event: Dict[str, Any], context: Any) -> Dict[str, An
             })
         }
     except Exception as e:
-        print(f"❌ 处理 webhook 失败: {e}")
+        logger.error("❌ 处理 webhook 失败: %s", e)
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
@@ -203,10 +343,10 @@ def handle_supabase_webhook(event: Dict[str, Any], context: Any) -> Dict[str, An
 
 def handle_direct_call(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """处理直接调用（测试用）"""
-    print(f"🧪 处理直接调用")
+    logger.info("🧪 处理直接调用")
     
     try:
-        success = process_notification(event)
+        success = process_notification(NotificationMessage.from_dict(event))
         return {
             'statusCode': 200 if success else 500,
             'body': json.dumps({
@@ -215,63 +355,60 @@ def handle_direct_call(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             })
         }
     except Exception as e:
-        print(f"❌ 处理失败: {e}")
+        logger.error("❌ 处理失败: %s", e)
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
 
 
-def process_notification(data: Dict[str, Any]) -> bool:
+def process_notification(notification: NotificationMessage) -> bool:
     """
     处理单个通知
     
     Args:
-        data: 通知数据
-            - user_id: 用户ID
-            - notification_type: 通知类型
-            - title: 标题
-            - body: 内容
-            - data: 额外数据
+        notification: 已解析的通知
     
     Returns:
         是否成功
     """
-    user_id = data.get('user_id')
-    notification_type = data.get('notification_type')
-    title = data.get('title')
-    body = data.get('body')
-    extra_data = data.get('data', {})
-    
-    print(f"🔔 处理通知: user={user_id}, type={notification_type}, title={title}")
+    from push_service import send_multicast_notification, get_user_tokens
     
-    # 获取用户 FCM tokens
-    tokens = get_user_tokens(user_id)
+    # 先查 token：没有设备的用户（常见于流失用户）直接返回，不初始化 Firebase、不组装推送
+    tokens = get_user_tokens(notification.user_id)
     
     if not tokens:
-        print(f"⚠️  用户 {user_id} 没有 FCM token")
+        logger.debug("⚠️  用户 %s 没有 FCM token", notification.user_id)
         return True  # 不算失败
     
-    print(f"📱 找到 {len(tokens)} 个设备")
+    _fb()
     
-    # 发送推送
-    result = send_push_notification(
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "🔔 处理通知: user=%s, type=%s, title=%s, 设备数=%d",
+            notification.user_id, notification.notification_type, notification.title, len(tokens)
+        )
+    
+    # 发送推送（同一用户的所有设备一次 multicast）
+    result = send_multicast_notification(
         tokens=tokens,
-        title=title,
-        body=body,
-        data=extra_data
+        title=notification.title,
+        body=notification.body,
+        data=notification.data
     )
     
     sent = result.get('success_count', 0)
     failed = result.get('failure_count', 0)
     
-    print(f"✅ 成功 {sent} 条，失败 {failed} 条")
+    logger.info("✅ 成功 %d 条，失败 %d 条", sent, failed)
     
     return sent > 0
 
 
 # 本地测试
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    
     # 测试 Supabase webhook 格式
     test_event = {
         "type": "INSERT",
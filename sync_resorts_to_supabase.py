@@ -11,18 +11,49 @@
     API_BASE_URL: 后端 API 地址（默认：https://api.steponsnow.com）
     SUPABASE_URL: Supabase 项目 URL
     SUPABASE_SERVICE_KEY: Supabase Service Key
+    SUPABASE_DB_URL: Supabase Postgres 直连地址（可选，设置后使用 COPY 批量同步）
 """
 
 import os
+import io
 import sys
+import asyncio
+import httpx
+import orjson
 import requests
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 # 加载环境变量
 load_dotenv()
 
+# PostgREST 并发上传数（受 Supabase 速率限制约束，HTTP/2 下在同一连接上复用）
+UPSERT_CONCURRENCY = 4
+
+# 每批 upsert 的雪场数；请求体超限（413）时退回小批次
+UPSERT_BATCH_SIZE = 500
+UPSERT_FALLBACK_BATCH_SIZE = 100
+
+# 同步到 Supabase resorts 表的列（enabled 与 synced_at 由同步脚本填写）
+SYNC_FIELDS = (
+    'id', 'name', 'slug', 'location', 'lat', 'lon',
+    'elevation_min', 'elevation_max',
+    'address', 'city', 'zip_code', 'phone', 'website',
+    'opening_hours_weekday', 'opening_hours_data', 'is_open_now',
+    'data_source', 'source_url', 'updated_at',
+)
+
+# 模块级 HTTP 会话：复用 TCP/TLS 连接，warm 容器中多次调用无需重新握手
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
 def get_resorts_from_rds():
     """
     通过 API 从 RDS 获取雪场数据
@@ -40,49 +71,30 @@ def get_resorts_from_rds():
     
     try:
         # 调用 API
-        response = requests.get(api_url, timeout=30)
+        response = _SESSION.get(api_url, timeout=30)
         response.raise_for_status()
         
-        data = response.json()
+        data = orjson.loads(response.content)
         resorts = data.get('resorts', [])
         
         print(f"✅ 从 API 获取到 {len(resorts)} 个雪场")
         
         # 🔥 只保留 enabled=true 的雪场
+        synced_at = datetime.now().isoformat()
         resort_data = []
         disabled_count = 0
         
         for r in resorts:
-            enabled = r.get('enabled', True)
-            
             # 跳过已禁用的雪场
-            if not enabled:
+            if not r.get('enabled', True):
                 disabled_count += 1
                 continue
             
-            resort_data.append({
-                'id': r.get('id'),
-                'name': r.get('name'),
-                'slug': r.get('slug'),
-                'location': r.get('location'),
-                'lat': r.get('lat'),
-                'lon': r.get('lon'),
-                'elevation_min': r.get('elevation_min'),
-                'elevation_max': r.get('elevation_max'),
-                'address': r.get('address'),
-                'city': r.get('city'),
-                'zip_code': r.get('zip_code'),
-                'phone': r.get('phone'),
-                'website': r.get('website'),
-                'opening_hours_weekday': r.get('opening_hours_weekday'),
-                'opening_hours_data': r.get('opening_hours_data'),
-                'is_open_now': r.get('is_open_now'),
-                'data_source': r.get('data_source'),
-                'source_url': r.get('source_url'),
-                'enabled': True,  # 同步到 Supabase 的都是启用的
-                'synced_at': datetime.now().isoformat(),
-                'updated_at': r.get('updated_at'),
-            })
+            # 只保留 Supabase resorts 表中存在的列（summary 接口还带有雪况、天气等字段）
+            row = {k: r.get(k) for k in SYNC_FIELDS}
+            row['enabled'] = True  # 同步到 Supabase 的都是启用的
+            row['synced_at'] = synced_at
+            resort_data.append(row)
         
         print(f"✅ 过滤后: {len(resort_data)} 个启用的雪场, {disabled_count} 个已禁用")
         
@@ -100,8 +112,8 @@ def sync_to_supabase(resort_data):
     将雪场数据同步到 Supabase
     
     🔥 软删除逻辑：
-    1. 删除 Supabase 中所有雪场
-    2. 从 RDS 重新插入 enabled=true 的雪场
+    1. upsert RDS 中 enabled=true 的雪场
+    2. 删除 Supabase 中不在本次列表里的雪场（已禁用或已删除）
     3. RDS 的 enabled 字段是唯一的控制开关
     """
     print("=" * 80)
@@ -133,26 +145,8 @@ def sync_to_supabase(resort_data):
             print("   - is_open_now (BOOLEAN)")
             print()
         
-        # 🔥 第1步：删除 Supabase 中所有雪场
-        print(f"🗑️  删除 Supabase 中所有现有雪场...")
-        try:
-            # 获取所有雪场 ID
-            existing_response = supabase.table('resorts').select('id').execute()
-            existing_ids = [item['id'] for item in existing_response.data]
-            
-            if existing_ids:
-                print(f"   找到 {len(existing_ids)} 个现有雪场，准备删除...")
-                # 批量删除
-                supabase.table('resorts').delete().in_('id', existing_ids).execute()
-                print(f"✅ 已删除所有现有雪场")
-            else:
-                print(f"ℹ️  Supabase 中没有现有雪场")
-        except Exception as e:
-            print(f"⚠️  删除现有雪场时出错: {e}")
-            # 继续执行，因为可能只是没有数据
-        
-        # 🔥 第2步：从 resorts_config.json 插入所有雪场
-        print(f"\n🔄 开始插入 {len(resort_data)} 条数据...")
+        # 🔥 第1步：upsert 所有启用的雪场（幂等，无需先删除）
+        print(f"\n🔄 开始 upsert {len(resort_data)} 条数据...")
         
         # 打印第一条数据的字段，用于调试
         if resort_data:
@@ -163,44 +157,60 @@ def sync_to_supabase(resort_data):
                 print(f"   {key}: {value}")
             print()
         
-        # Supabase 的插入有批量限制，我们分批处理
-        batch_size = 100
-        total_synced = 0
+        db_url = os.getenv('SUPABASE_DB_URL')
+        if db_url:
+            # Postgres 直连：COPY 到临时表后一次性 upsert，并在同一事务内清理已禁用的雪场
+            print("📝 插入策略：Postgres 直连 COPY + INSERT ... ON CONFLICT (单个事务)")
+            print()
+            
+            total_synced = _sync_via_copy(db_url, resort_data)
+            
+            print(f"✅ upsert 完成！共同步 {total_synced} 个雪场，已清理不在启用列表中的雪场")
+        else:
+            # Supabase 的插入有批量限制，我们分批并发上传
+            batch_size = UPSERT_BATCH_SIZE
         
-        print("📝 插入策略：全新插入所有雪场")
-        print()
+            # 每行只序列化一次，之后以原始字节直接 POST（不经过 supabase-py 的二次序列化）
+            # 批次请求体由行字节拼接而成，413 拆分时无需重新序列化
+            rows = [orjson.dumps(row) for row in resort_data]
+            payloads = [
+                (resort_data[i:i + batch_size], rows[i:i + batch_size])
+                for i in range(0, len(resort_data), batch_size)
+            ]
         
-        for i in range(0, len(resort_data), batch_size):
-            batch = resort_data[i:i + batch_size]
-            
-            try:
-                # 直接插入
-                response = supabase.table('resorts').insert(batch).execute()
-                
-                total_synced += len(batch)
-                print(f"   进度: {total_synced}/{len(resort_data)}")
-            except Exception as batch_error:
-                print(f"   ⚠️  批次 {i}-{i+len(batch)} 插入失败: {batch_error}")
-                # 尝试逐个插入以找出问题
-                for item in batch:
-                    try:
-                        supabase.table('resorts').insert([item]).execute()
-                        total_synced += 1
-                    except Exception as item_error:
-                        print(f"      ❌ 雪场 ID {item['id']} ({item['name']}) 插入失败: {item_error}")
-                print(f"   进度: {total_synced}/{len(resort_data)}")
-        
-        print(f"✅ 同步完成！共插入 {total_synced} 个雪场")
+            print(f"📝 插入策略：{len(payloads)} 个批次并发 upsert (并发数 {UPSERT_CONCURRENCY})")
+            print()
+        
+            total_synced = asyncio.run(
+                _upsert_batches_async(supabase_url, supabase_key, payloads, len(resort_data))
+            )
+        
+            print(f"✅ upsert 完成！共同步 {total_synced} 个雪场")
+        
+            # 🔥 第2步：一条 DELETE 清理不再启用的雪场
+            # 有批次失败时跳过（与直连模式的单事务一致：upsert 不完整就不做删除，下次同步再清理）
+            if total_synced < len(resort_data):
+                print(f"⚠️  {len(resort_data) - total_synced} 个雪场 upsert 失败，跳过删除已禁用的雪场")
+            else:
+                keep_ids = [r['id'] for r in resort_data]
+                print(f"🗑️  删除 Supabase 中已禁用的雪场...")
+                supabase.table('resorts').delete().not_.in_('id', keep_ids).execute()
+                print(f"✅ 已清理不在启用列表中的雪场")
         
         # 验证数据
-        count_response = supabase.table('resorts').select('*', count='exact').execute()
-        print(f"\n✅ Supabase 中现有 {count_response.count} 个雪场")
+        supabase_count = _count_resorts(supabase_url, supabase_key)
+        if supabase_count is None:
+            print("\n⚠️  Supabase 中现有雪场数量: 未知（无法解析 Content-Range）")
+        else:
+            print(f"\n✅ Supabase 中现有 {supabase_count} 个雪场")
         print(f"✅ 配置文件中有 {len(resort_data)} 个雪场")
         
-        if count_response.count == len(resort_data):
+        if supabase_count is None:
+            print("⚠️  无法校验同步结果: Supabase 雪场数量未知")
+        elif supabase_count == len(resort_data):
             print(f"🎉 数据完全同步！")
         else:
-            print(f"⚠️  数据不一致: Supabase {count_response.count} vs 配置文件 {len(resort_data)}")
+            print(f"⚠️  数据不一致: Supabase {supabase_count} vs 配置文件 {len(resort_data)}")
         
         return True
     
@@ -210,6 +220,145 @@ def sync_to_supabase(resort_data):
         traceback.print_exc()
         raise
 
+def _count_resorts(supabase_url, supabase_key):
+    """
+    统计 Supabase 中的雪场数量
+    
+    HEAD 请求 + Prefer: count=exact，总数从 Content-Range 读取（如 "0-0/123"），不返回任何行
+    
+    Returns:
+        雪场数量，无法解析时返回 None
+    """
+    response = _SESSION.head(
+        f"{supabase_url}/rest/v1/resorts",
+        params={'select': 'id'},
+        headers={
+            'apikey': supabase_key,
+            'Authorization': f'Bearer {supabase_key}',
+            'Prefer': 'count=exact',
+            'Range-Unit': 'items',
+            'Range': '0-0',
+        },
+        timeout=30
+    )
+    response.raise_for_status()
+    
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+def _copy_value(value):
+    """转换为 COPY text 格式的字段值"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (dict, list)):
+        value = orjson.dumps(value).decode('utf-8')
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+def _sync_via_copy(db_url, resort_data):
+    """
+    通过 Postgres 直连同步雪场（绕过 PostgREST 的 HTTP/JSON 开销）
+    
+    COPY 到临时表 → INSERT ... ON CONFLICT (id) DO UPDATE → 删除不在本次列表中的雪场，
+    全部在一个事务内完成
+    
+    Args:
+        db_url: Supabase Postgres 连接地址
+        resort_data: 雪场数据列表
+    
+    Returns:
+        成功同步的雪场数量
+    """
+    import psycopg2
+    
+    columns = SYNC_FIELDS + ('enabled', 'synced_at')
+    column_list = ', '.join(columns)
+    updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in columns if c != 'id')
+    
+    buf = io.StringIO()
+    for row in resort_data:
+        buf.write('\t'.join(_copy_value(row.get(c)) for c in columns))
+        buf.write('\n')
+    buf.seek(0)
+    
+    conn = psycopg2.connect(db_url)
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("CREATE TEMP TABLE resorts_stage (LIKE resorts INCLUDING DEFAULTS) ON COMMIT DROP")
+                cur.copy_expert(f"COPY resorts_stage ({column_list}) FROM STDIN", buf)
+                cur.execute(
+                    f"INSERT INTO resorts ({column_list}) "
+                    f"SELECT {column_list} FROM resorts_stage "
+                    f"ON CONFLICT (id) DO UPDATE SET {updates}"
+                )
+                synced = cur.rowcount
+                cur.execute("DELETE FROM resorts WHERE id NOT IN (SELECT id FROM resorts_stage)")
+                print(f"🗑️  已删除 {cur.rowcount} 个已禁用的雪场")
+    finally:
+        conn.close()
+    
+    return synced
+
+def _join_rows(rows):
+    """将预序列化的行拼接为 JSON 数组请求体"""
+    return b'[' + b','.join(rows) + b']'
+
+async def _upsert_batches_async(supabase_url, supabase_key, payloads, total):
+    """
+    通过 PostgREST 并发 upsert 所有批次
+    
+    Args:
+        supabase_url: Supabase 项目 URL
+        supabase_key: Supabase Service Key
+        payloads: (批次数据, 该批次每行预序列化的 JSON 字节) 列表
+        total: 雪场总数（用于打印进度）
+    
+    Returns:
+        成功同步的雪场数量
+    """
+    url = f"{supabase_url}/rest/v1/resorts?on_conflict=id"
+    headers = {
+        'apikey': supabase_key,
+        'Authorization': f'Bearer {supabase_key}',
+        'Content-Type': 'application/json',
+        'Prefer': 'resolution=merge-duplicates,return=minimal',
+    }
+    semaphore = asyncio.Semaphore(UPSERT_CONCURRENCY)
+    synced = 0
+    
+    async with httpx.AsyncClient(headers=headers, timeout=30, http2=True) as client:
+        
+        async def post_batch(batch, rows):
+            nonlocal synced
+            async with semaphore:
+                try:
+                    response = await client.post(url, content=_join_rows(rows))
+                    if response.status_code == 413:
+                        # 请求体超过 PostgREST 限制，拆成小批次重新上传
+                        print(f"   ℹ️  批次 {batch[0]['id']}-{batch[-1]['id']} 过大 (413)，拆分为 {UPSERT_FALLBACK_BATCH_SIZE} 条一批")
+                        for i in range(0, len(batch), UPSERT_FALLBACK_BATCH_SIZE):
+                            chunk = rows[i:i + UPSERT_FALLBACK_BATCH_SIZE]
+                            response = await client.post(url, content=_join_rows(chunk))
+                            response.raise_for_status()
+                            synced += len(chunk)
+                    else:
+                        response.raise_for_status()
+                        synced += len(batch)
+                except Exception as batch_error:
+                    # upsert 是幂等的：失败批次中已存在的雪场保留旧数据，下次同步再更新
+                    print(f"   ⚠️  批次 {batch[0]['id']}-{batch[-1]['id']} upsert 失败: {batch_error}")
+                print(f"   进度: {synced}/{total}")
+        
+        await asyncio.gather(*[post_batch(batch, rows) for batch, rows in payloads])
+    
+    return synced
+
 def main():
     """主函数"""
     print("\n")
@@ -2,13 +2,121 @@
 # -*- coding: utf-8 -*-
 """
 测试并发采集速度
+
+用法:
+    python test_concurrent_collection.py          # 使用 OPENMETEO_MAX_WORKERS 采集前 20 个雪场
+    python test_concurrent_collection.py --tune   # 扫描 4/8/16/32 线程，推荐 OPENMETEO_MAX_WORKERS
+    python test_concurrent_collection.py --no-cache  # 忽略 OPENMETEO_CACHE_TTL，强制请求 API
+    python test_concurrent_collection.py --compare   # 对比线程池 collect_all 和 asyncio collect_all_async
+    python test_concurrent_collection.py --batch     # 天气数据使用多坐标批量请求（可与其他参数组合）
 """
 
+import sys
 import time
+import argparse
 from resort_manager import ResortDataManager
+from collectors.base import BaseCollector
+from collectors.openmeteo import OpenMeteoCollector
+from config import Config
 from datetime import datetime
 
+# --tune 扫描的线程数
+TUNE_WORKERS = [4, 8, 16, 32]
+
+
+def run_collection(manager, max_workers, use_async=False, batch_weather=False):
+    """
+    执行一次采集并计时
+    
+    Args:
+        manager: ResortDataManager
+        max_workers: 并发数
+        use_async: 是否使用 collect_all_async（asyncio + httpx）
+        batch_weather: 是否批量请求天气数据（OpenMeteoCollector.collect_many）
+    
+    Returns:
+        (耗时秒数, 成功数, 429 次数)
+    """
+    rate_limited_before = BaseCollector.rate_limited_count
+    collect = manager.collect_all_async if use_async else manager.collect_all
+    
+    start_time = time.time()
+    results = collect(enabled_only=False, max_workers=max_workers, batch_weather=batch_weather)
+    duration = time.time() - start_time
+    
+    return duration, len(results), BaseCollector.rate_limited_count - rate_limited_before
+
+
+def tune(manager, test_count, total_count, batch_weather=False):
+    """
+    扫描不同线程数，选择耗时曲线的拐点
+    
+    拐点：成功数最多、且耗时不超过最快一次 10% 的最小线程数
+    （线程数再增加收益很小，反而更容易触发 429）
+    """
+    runs = []
+    for workers in TUNE_WORKERS:
+        duration, success, rate_limited = run_collection(manager, workers, batch_weather=batch_weather)
+        runs.append((workers, duration, success, rate_limited))
+    
+    print()
+    print("=" * 70)
+    print("📊 并发线程数扫描结果")
+    print("=" * 70)
+    # 表格先拼成一个字符串再一次写出（逐行 print 在无缓冲 stdout 下每行都会 flush）
+    lines = [f"{'线程数':>6} {'耗时(秒)':>10} {'成功':>8} {'429次数':>8} {'估算全量(分钟)':>14}"]
+    for workers, duration, success, rate_limited in runs:
+        estimated = duration / test_count * total_count / 60
+        lines.append(f"{workers:>6} {duration:>10.2f} {success:>5}/{test_count:<3} {rate_limited:>7} {estimated:>14.1f}")
+    sys.stdout.write("\n".join(lines) + "\n\n")
+    
+    best_success = max(success for _, _, success, _ in runs)
+    candidates = [r for r in runs if r[2] == best_success]
+    fastest = min(duration for _, duration, _, _ in candidates)
+    knee = min(workers for workers, duration, _, _ in candidates if duration <= fastest * 1.1)
+    
+    print(f"✅ 推荐线程数: {knee}")
+    print(f"   export OPENMETEO_MAX_WORKERS={knee}")
+    print(f"   （Lambda 部署时在函数环境变量中设置 OPENMETEO_MAX_WORKERS）")
+    print()
+
+
+def compare(manager, test_count, batch_weather=False):
+    """对比线程池和 asyncio 两种采集方式，输出更快的一种"""
+    runs = []
+    for label, use_async in (('threads', False), ('asyncio', True)):
+        duration, success, rate_limited = run_collection(
+            manager, Config.OPENMETEO_MAX_WORKERS, use_async=use_async, batch_weather=batch_weather
+        )
+        runs.append((label, duration, success, rate_limited))
+    
+    print()
+    print("=" * 70)
+    print(f"📊 线程池 vs asyncio（并发 {Config.OPENMETEO_MAX_WORKERS}）")
+    print("=" * 70)
+    lines = [f"{'方式':>8} {'耗时(秒)':>10} {'成功':>8} {'429次数':>8}"]
+    for label, duration, success, rate_limited in runs:
+        lines.append(f"{label:>8} {duration:>10.2f} {success:>5}/{test_count:<3} {rate_limited:>7}")
+    sys.stdout.write("\n".join(lines) + "\n\n")
+    
+    # 成功数优先，其次耗时
+    winner = max(runs, key=lambda r: (r[2], -r[1]))
+    print(f"✅ 更快的方式: {winner[0]} ({winner[1]:.2f} 秒)")
+    print()
+
+
 def main():
+    parser = argparse.ArgumentParser(description='测试并发采集速度')
+    parser.add_argument('--tune', action='store_true', help=f'扫描线程数 {TUNE_WORKERS} 并推荐 OPENMETEO_MAX_WORKERS')
+    parser.add_argument('--no-cache', action='store_true', help='不使用 Open-Meteo 本地缓存（测速时应使用）')
+    parser.add_argument('--compare', action='store_true', help='对比线程池和 asyncio + httpx 两种采集方式')
+    parser.add_argument('--batch', action='store_true', help='天气数据使用多坐标批量请求（每 50 个雪场一个请求）')
+    args = parser.parse_args()
+    
+    # 测速和 --tune 需要真实请求，缓存命中会让结果失真
+    if args.no_cache or args.tune or args.compare:
+        Config.OPENMETEO_CACHE_TTL = 0
+    
     print("=" * 70)
     print("🚀 测试并发采集")
     print("=" * 70)
@@ -32,26 +140,28 @@ def main():
     # 临时修改配置，只采集前 N 个
     manager.resorts = enabled_resorts[:test_count]
     
-    # 开始计时
-    start_time = time.time()
-    start_datetime = datetime.now()
+    if args.tune:
+        tune(manager, test_count, total_count, batch_weather=args.batch)
+        return
     
-    # 执行采集
-    results = manager.collect_all(enabled_only=False, max_workers=10)
+    if args.compare:
+        compare(manager, test_count, batch_weather=args.batch)
+        return
     
-    # 结束计时
-    end_time = time.time()
-    end_datetime = datetime.now()
-    duration = end_time - start_time
+    # 执行采集
+    duration, success_count, rate_limited = run_collection(manager, Config.OPENMETEO_MAX_WORKERS, batch_weather=args.batch)
     
     # 显示结果
     print()
     print("=" * 70)
     print("📊 采集结果统计")
     print("=" * 70)
+    print(f"🧵 并发线程数: {Config.OPENMETEO_MAX_WORKERS}")
+    print(f"🌤️  天气请求: {'批量（多坐标）' if args.batch else '逐个雪场'}")
     print(f"⏱️  总耗时: {duration:.2f} 秒")
-    print(f"✅ 成功: {len(results)}/{test_count}")
-    print(f"❌ 失败: {test_count - len(results)}/{test_count}")
+    print(f"✅ 成功: {success_count}/{test_count}")
+    print(f"❌ 失败: {test_count - success_count}/{test_count}")
+    print(f"🚦 HTTP 429: {rate_limited} 次")
     print(f"📈 平均每个雪场: {duration / test_count:.2f} 秒")
     print()
     
@@ -65,15 +175,22 @@ def main():
     estimated_full_minutes = estimated_full_time / 60 if test_count > 0 else 0
     if estimated_full_minutes > 14:
         print("⚠️  警告: 估算时间超过 Lambda 最大超时（15分钟）")
-        print(f"   建议增加并发线程数或分批采集")
+        print(f"   建议运行 --tune 调整并发线程数或分批采集")
         print()
     else:
         print("✅ 估算时间在 Lambda 超时限制内，可以全量采集")
         print()
     
+    # 连接复用情况：新建连接数远小于请求数说明线程之间复用了 keep-alive 连接
+    lines = ["🔌 Open-Meteo 连接池:"]
+    pools = OpenMeteoCollector._SESSION.get_adapter('https://').poolmanager.pools
+    for key in pools.keys():
+        pool = pools[key]
+        lines.append(f"   {pool.host}: 请求 {pool.num_requests} 次，新建连接 {pool.num_connections} 个")
+    sys.stdout.write("\n".join(lines) + "\n\n")
+    
     print("提示: 设置 OPENMETEO_API_KEY 环境变量可以使用付费 API（无速率限制）")
     print()
 
 if __name__ == '__main__':
     main()
-
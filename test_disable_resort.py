@@ -2,13 +2,21 @@
 # -*- coding: utf-8 -*-
 """
 测试雪场软删除功能
+
+用法:
+    python test_disable_resort.py <resort_id>
+    python test_disable_resort.py --bench [次数]   # 验证 DatabaseManager 复用连接池
 """
 
 import os
+import time
 from dotenv import load_dotenv
+from sqlalchemy import text
 from db_manager import DatabaseManager
 
-load_dotenv()
+# Lambda 中环境变量已由运行时注入，不需要读取 .env 文件
+if not os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    load_dotenv()
 
 def test_disable_resort(resort_id: int):
     """测试禁用雪场"""
@@ -53,14 +61,51 @@ def test_disable_resort(resort_id: int):
         import traceback
         traceback.print_exc()
 
+def bench_connection_reuse(iterations: int = 100):
+    """
+    测试连接池复用：反复创建 DatabaseManager 并执行一次查询
+    
+    第一次需要建立连接池和建表检查，之后的每次都应复用池中的连接
+    """
+    print(f"\n{'='*80}")
+    print(f"测试连接池复用 ({iterations} 次)")
+    print(f"{'='*80}\n")
+    
+    def open_query_close():
+        db_manager = DatabaseManager()
+        session = db_manager.Session()
+        session.execute(text("SELECT 1"))
+        session.close()
+        db_manager.close()
+    
+    start = time.perf_counter()
+    open_query_close()
+    cold = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        open_query_close()
+    total = time.perf_counter() - start
+    
+    print(f"\n⏱️  首次（建立连接池）: {cold * 1000:.1f} ms")
+    print(f"⏱️  后续 {iterations} 次合计: {total * 1000:.1f} ms（平均 {total / iterations * 1000:.2f} ms）")
+    
+    assert total < iterations * cold, "连接没有被复用：后续调用不比首次快"
+    print(f"✅ 连接池复用正常")
+
 if __name__ == '__main__':
     import sys
     
     if len(sys.argv) < 2:
         print("用法: python test_disable_resort.py <resort_id>")
         print("示例: python test_disable_resort.py 641")
+        print("      python test_disable_resort.py --bench 100")
         sys.exit(1)
     
+    if sys.argv[1] == '--bench':
+        bench_connection_reuse(int(sys.argv[2]) if len(sys.argv) > 2 else 100)
+        sys.exit(0)
+    
     resort_id = int(sys.argv[1])
     test_disable_resort(resort_id)
 
@@ -6,52 +6,71 @@ Lambda 函数 - 雪道数据采集
 """
 
 import json
-import sys
-import os
+import orjson
+
+# 模块级导入和初始化：只在冷启动时执行一次，热启动直接复用
+from collect_trails import run as collect_trails_run
+from db_manager import DatabaseManager
+
+try:
+    _DB = DatabaseManager()
+except Exception as e:
+    print(f"⚠️  冷启动时数据库初始化失败，将在调用时重试: {e}")
+    _DB = None
+
+_INVOCATION_COUNT = 0
+
+
+def _dumps(obj) -> str:
+    """orjson 序列化（Lambda 响应 body 需要 str）"""
+    return orjson.dumps(obj).decode('utf-8')
+
+
+def _get_db() -> DatabaseManager:
+    """获取模块级数据库管理器（冷启动失败时在这里重新创建）"""
+    global _DB
+    if _DB is None:
+        _DB = DatabaseManager()
+    return _DB
+
 
 def lambda_handler(event, context):
     """Lambda 处理函数"""
+    global _INVOCATION_COUNT
+    _INVOCATION_COUNT += 1
     
-    print(f"收到事件: {json.dumps(event)}")
+    function_arn = getattr(context, 'invoked_function_arn', 'local')
+    if _INVOCATION_COUNT == 1:
+        print(f"🧊 冷启动: {function_arn}")
+    else:
+        print(f"♻️  热启动 (第 {_INVOCATION_COUNT} 次调用)，复用数据库连接: {function_arn}")
+    
+    print(f"收到事件: {_dumps(event)}")
     
     # 从事件中获取参数
     limit = event.get('limit')
     resort_id = event.get('resort_id')
     resort_slug = event.get('resort_slug')
     
-    # 构建命令行参数
-    args = []
-    if limit:
-        args.extend(['--limit', str(limit)])
-    if resort_id:
-        args.extend(['--resort-id', str(resort_id)])
-    if resort_slug:
-        args.extend(['--resort-slug', resort_slug])
-    
-    print(f"开始采集雪道数据，参数: {args}")
+    print(f"开始采集雪道数据，参数: limit={limit}, resort_id={resort_id}, resort_slug={resort_slug}")
     
     try:
-        # 导入并运行 collect_trails 主函数
-        from collect_trails import main as collect_trails_main
+        collect_trails_run(
+            limit=int(limit) if limit else None,
+            resort_id=int(resort_id) if resort_id else None,
+            resort_slug=resort_slug,
+            db_manager=_get_db()
+        )
         
-        # 临时修改 sys.argv
-        original_argv = sys.argv
-        sys.argv = ['collect_trails.py'] + args
-        
-        try:
-            collect_trails_main()
-            
-            return {
-                'statusCode': 200,
-                'body': json.dumps({
-                    'message': 'Trail data collection completed successfully',
-                    'limit': limit,
-                    'resort_id': resort_id,
-                    'resort_slug': resort_slug
-                })
-            }
-        finally:
-            sys.argv = original_argv
+        return {
+            'statusCode': 200,
+            'body': _dumps({
+                'message': 'Trail data collection completed successfully',
+                'limit': limit,
+                'resort_id': resort_id,
+                'resort_slug': resort_slug
+            })
+        }
             
     except Exception as e:
         print(f"❌ 采集失败: {str(e)}")
@@ -60,7 +79,7 @@ def lambda_handler(event, context):
         
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'message': 'Trail data collection failed',
                 'error': str(e)
             })
@@ -4,148 +4,159 @@
 雪道采集报告 HTML 生成器
 """
 
+import os
+import json
+import hashlib
+import functools
 from datetime import datetime
 from typing import Dict, List
+from html_minify import minify_html
 
+# orjson 可选：未安装时使用标准库 json 生成筛选索引
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def generate_trails_html_report(report_data: Dict, output_file: str):
-    """
-    生成雪道采集报告的 HTML 文件
-    
-    Args:
-        report_data: 报告数据字典
-        output_file: 输出 HTML 文件路径
-    """
-    summary = report_data.get('summary', {})
-    resorts = report_data.get('resorts', [])
-    timestamp = report_data.get('timestamp', '')
-    
-    # 格式化时间戳
-    try:
-        dt = datetime.fromisoformat(timestamp)
-        formatted_time = dt.strftime('%Y-%m-%d %H:%M:%S')
-    except:
-        formatted_time = timestamp
-    
-    # 计算成功率
-    total = summary.get('total', 0)
-    success = summary.get('success', 0)
-    failed = summary.get('failed', 0)
-    skipped = summary.get('skipped', 0)
-    success_rate = (success / total * 100) if total > 0 else 0
-    
-    # 开始构建 HTML
-    html_content = f"""<!DOCTYPE html>
+# 报告模板版本：修改页面模板或渲染逻辑时递增，使已有的内容哈希失效（报告数据不变也会重新生成）
+_TEMPLATE_VERSION = 1
+
+# 每次运行都会变化的计时字段，不参与内容哈希
+_RUN_TIMING_KEYS = frozenset(('timestamp', 'total_duration', 'duration'))
+
+# HTML 转义表（str.translate 一次遍历完成，与 html.escape(quote=True) 结果相同）
+_ESC_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#x27;',
+})
+
+
+def _esc(value) -> str:
+    """转义插入到 HTML 文本或属性中的值（雪场名、错误信息等来自外部数据）"""
+    return str(value).translate(_ESC_TABLE)
+
+
+# 以下页面片段在模块加载时压缩一次（minify_html），生成报告时不再处理空白
+
+# 页面开头（到 <title> 之前），不含任何变量
+_DOCTYPE_HEAD = minify_html("""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>雪道数据采集报告 - {formatted_time}</title>
-    <style>
-        * {{
+""")
+
+_TITLE_TPL = "<title>雪道数据采集报告 - {formatted_time}</title>"
+
+# 样式表（纯字符串，不经过 format，不需要转义花括号）
+_STATIC_CSS = minify_html("""    <style>
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             min-height: 100vh;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1400px;
             margin: 0 auto;
-        }}
+        }
         
-        .header {{
+        .header {
             background: white;
             border-radius: 16px;
             padding: 32px;
             margin-bottom: 24px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 32px;
             color: #1a202c;
             margin-bottom: 8px;
-        }}
+        }
         
-        .header .timestamp {{
+        .header .timestamp {
             color: #718096;
             font-size: 14px;
-        }}
+        }
         
-        .summary-cards {{
+        .summary-cards {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
             gap: 20px;
             margin-bottom: 24px;
-        }}
+        }
         
-        .card {{
+        .card {
             background: white;
             border-radius: 12px;
             padding: 24px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
             transition: transform 0.2s;
-        }}
+        }
         
-        .card:hover {{
+        .card:hover {
             transform: translateY(-4px);
-        }}
+        }
         
-        .card-title {{
+        .card-title {
             font-size: 14px;
             color: #718096;
             margin-bottom: 8px;
             font-weight: 500;
-        }}
+        }
         
-        .card-value {{
+        .card-value {
             font-size: 36px;
             font-weight: bold;
             margin-bottom: 8px;
-        }}
+        }
         
-        .card.total .card-value {{ color: #4299e1; }}
-        .card.success .card-value {{ color: #48bb78; }}
-        .card.failed .card-value {{ color: #f56565; }}
-        .card.skipped .card-value {{ color: #ed8936; }}
-        .card.trails .card-value {{ color: #9f7aea; }}
+        .card.total .card-value { color: #4299e1; }
+        .card.success .card-value { color: #48bb78; }
+        .card.failed .card-value { color: #f56565; }
+        .card.skipped .card-value { color: #ed8936; }
+        .card.trails .card-value { color: #9f7aea; }
         
-        .progress-bar {{
+        .progress-bar {
             height: 8px;
             background: #e2e8f0;
             border-radius: 4px;
             overflow: hidden;
             margin-top: 12px;
-        }}
+        }
         
-        .progress-fill {{
+        .progress-fill {
             height: 100%;
             border-radius: 4px;
             transition: width 0.3s ease;
-        }}
+        }
         
-        .filters {{
+        .filters {
             background: white;
             border-radius: 12px;
             padding: 20px;
             margin-bottom: 24px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .filter-buttons {{
+        .filter-buttons {
             display: flex;
             gap: 12px;
             flex-wrap: wrap;
-        }}
+        }
         
-        .filter-btn {{
+        .filter-btn {
             padding: 10px 20px;
             border: 2px solid #e2e8f0;
             background: white;
@@ -154,122 +165,122 @@ def generate_trails_html_report(report_data: Dict, output_file: str):
             font-size: 14px;
             font-weight: 500;
             transition: all 0.2s;
-        }}
+        }
         
-        .filter-btn:hover {{
+        .filter-btn:hover {
             background: #f7fafc;
-        }}
+        }
         
-        .filter-btn.active {{
+        .filter-btn.active {
             background: #667eea;
             color: white;
             border-color: #667eea;
-        }}
+        }
         
-        .search-box {{
+        .search-box {
             margin-top: 12px;
-        }}
+        }
         
-        .search-input {{
+        .search-input {
             width: 100%;
             padding: 12px 16px;
             border: 2px solid #e2e8f0;
             border-radius: 8px;
             font-size: 14px;
             transition: border-color 0.2s;
-        }}
+        }
         
-        .search-input:focus {{
+        .search-input:focus {
             outline: none;
             border-color: #667eea;
-        }}
+        }
         
-        .resorts-grid {{
+        .resorts-grid {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
             gap: 20px;
-        }}
+        }
         
-        .resort-card {{
+        .resort-card {
             background: white;
             border-radius: 12px;
             padding: 24px;
             box-shadow: 0 4px 6px rgba(0,0,0,0.1);
             transition: all 0.2s;
-        }}
+        }
         
-        .resort-card:hover {{
+        .resort-card:hover {
             box-shadow: 0 8px 12px rgba(0,0,0,0.15);
-        }}
+        }
         
-        .resort-header {{
+        .resort-header {
             display: flex;
             justify-content: space-between;
             align-items: start;
             margin-bottom: 16px;
-        }}
+        }
         
-        .resort-name {{
+        .resort-name {
             font-size: 18px;
             font-weight: bold;
             color: #1a202c;
             margin-bottom: 4px;
-        }}
+        }
         
-        .resort-meta {{
+        .resort-meta {
             font-size: 12px;
             color: #718096;
-        }}
+        }
         
-        .status-badge {{
+        .status-badge {
             padding: 6px 12px;
             border-radius: 6px;
             font-size: 12px;
             font-weight: 600;
             white-space: nowrap;
-        }}
+        }
         
-        .status-badge.success {{
+        .status-badge.success {
             background: #c6f6d5;
             color: #22543d;
-        }}
+        }
         
-        .status-badge.failed {{
+        .status-badge.failed {
             background: #fed7d7;
             color: #742a2a;
-        }}
+        }
         
-        .status-badge.skipped {{
+        .status-badge.skipped {
             background: #feebc8;
             color: #7c2d12;
-        }}
+        }
         
-        .trails-stats {{
+        .trails-stats {
             display: grid;
             grid-template-columns: repeat(2, 1fr);
             gap: 12px;
             margin-top: 16px;
-        }}
+        }
         
-        .stat-item {{
+        .stat-item {
             background: #f7fafc;
             padding: 12px;
             border-radius: 8px;
-        }}
+        }
         
-        .stat-label {{
+        .stat-label {
             font-size: 12px;
             color: #718096;
             margin-bottom: 4px;
-        }}
+        }
         
-        .stat-value {{
+        .stat-value {
             font-size: 20px;
             font-weight: bold;
             color: #2d3748;
-        }}
+        }
         
-        .error-message {{
+        .error-message {
             margin-top: 12px;
             padding: 12px;
             background: #fff5f5;
@@ -277,50 +288,53 @@ def generate_trails_html_report(report_data: Dict, output_file: str):
             border-radius: 4px;
             font-size: 13px;
             color: #742a2a;
-        }}
+        }
         
-        .duration {{
+        .duration {
             margin-top: 8px;
             font-size: 12px;
             color: #718096;
-        }}
+        }
         
-        .difficulty-badges {{
+        .difficulty-badges {
             display: flex;
             gap: 8px;
             margin-top: 12px;
             flex-wrap: wrap;
-        }}
+        }
         
-        .difficulty-badge {{
+        .difficulty-badge {
             padding: 4px 8px;
             border-radius: 4px;
             font-size: 11px;
             font-weight: 600;
-        }}
+        }
         
-        .difficulty-badge.easy {{
+        .difficulty-badge.easy {
             background: #c6f6d5;
             color: #22543d;
-        }}
+        }
         
-        .difficulty-badge.intermediate {{
+        .difficulty-badge.intermediate {
             background: #bee3f8;
             color: #2c5282;
-        }}
+        }
         
-        .difficulty-badge.advanced {{
+        .difficulty-badge.advanced {
             background: #fbb6ce;
             color: #702459;
-        }}
+        }
         
-        .difficulty-badge.expert {{
+        .difficulty-badge.expert {
             background: #2d3748;
             color: white;
-        }}
+        }
     </style>
 </head>
-<body>
+""")
+
+# 页面主体开头（汇总卡片 + 筛选栏），每次生成只 format 一次
+_SUMMARY_TEMPLATE = minify_html("""<body>
     <div class="container">
         <!-- Header -->
         <div class="header">
@@ -332,12 +346,12 @@ def generate_trails_html_report(report_data: Dict, output_file: str):
         <div class="summary-cards">
             <div class="card total">
                 <div class="card-title">总雪场数</div>
-                <div class="card-value">{summary.get('total', 0)}</div>
+                <div class="card-value">{total}</div>
             </div>
             
             <div class="card success">
                 <div class="card-title">✅ 采集成功</div>
-                <div class="card-value">{summary.get('success', 0)}</div>
+                <div class="card-value">{success}</div>
                 <div class="progress-bar">
                     <div class="progress-fill" style="width: {success_rate}%; background: #48bb78;"></div>
                 </div>
@@ -345,79 +359,121 @@ def generate_trails_html_report(report_data: Dict, output_file: str):
             
             <div class="card failed">
                 <div class="card-title">❌ 采集失败</div>
-                <div class="card-value">{summary.get('failed', 0)}</div>
+                <div class="card-value">{failed}</div>
                 <div class="progress-bar">
-                    <div class="progress-fill" style="width: {(failed / total * 100) if total > 0 else 0}%; background: #f56565;"></div>
+                    <div class="progress-fill" style="width: {failed_rate}%; background: #f56565;"></div>
                 </div>
             </div>
             
             <div class="card skipped">
                 <div class="card-title">⏭️ 已有数据</div>
-                <div class="card-value">{summary.get('skipped', 0)}</div>
+                <div class="card-value">{skipped}</div>
                 <div class="progress-bar">
-                    <div class="progress-fill" style="width: {(skipped / total * 100) if total > 0 else 0}%; background: #ed8936;"></div>
+                    <div class="progress-fill" style="width: {skipped_rate}%; background: #ed8936;"></div>
                 </div>
             </div>
             
             <div class="card trails">
                 <div class="card-title">🎿 总雪道数</div>
-                <div class="card-value">{summary.get('total_trails', 0)}</div>
+                <div class="card-value">{total_trails}</div>
             </div>
         </div>
         
         <!-- Filters -->
         <div class="filters">
             <div class="filter-buttons">
-                <button class="filter-btn active" onclick="filterResorts('all')">🏔️ 全部 ({summary.get('total', 0)})</button>
-                <button class="filter-btn" onclick="filterResorts('success')">✅ 成功 ({summary.get('success', 0)})</button>
-                <button class="filter-btn" onclick="filterResorts('failed')">❌ 失败 ({summary.get('failed', 0)})</button>
-                <button class="filter-btn" onclick="filterResorts('skipped')">⏭️ 跳过 ({summary.get('skipped', 0)})</button>
+                <button class="filter-btn active" onclick="filterResorts('all', this)">🏔️ 全部 ({total})</button>
+                <button class="filter-btn" onclick="filterResorts('success', this)">✅ 成功 ({success})</button>
+                <button class="filter-btn" onclick="filterResorts('failed', this)">❌ 失败 ({failed})</button>
+                <button class="filter-btn" onclick="filterResorts('skipped', this)">⏭️ 跳过 ({skipped})</button>
             </div>
             <div class="search-box">
-                <input type="text" class="search-input" placeholder="🔍 搜索雪场名称..." onkeyup="searchResorts(this.value)">
+                <input type="text" class="search-input" placeholder="🔍 搜索雪场名称..." oninput="searchResorts(this.value)">
             </div>
         </div>
         
         <!-- Resorts Grid -->
         <div class="resorts-grid">
-"""
-    
-    # 添加每个雪场的卡片
-    for resort in resorts:
-        status = resort.get('status', 'failed')
-        status_text = {
-            'success': '✅ 成功',
-            'failed': '❌ 失败',
-            'skipped': '⏭️ 跳过'
-        }.get(status, '❓ 未知')
-        
-        trails_count = resort.get('trails_count', 0)
-        boundary_points = resort.get('boundary_points', 0)
-        duration = resort.get('duration', 0)
-        error = resort.get('error', '')
-        
-        # 雪道难度统计
-        difficulty_stats = resort.get('difficulty_stats', {})
-        easy = difficulty_stats.get('easy', 0)
-        intermediate = difficulty_stats.get('intermediate', 0)
-        advanced = difficulty_stats.get('advanced', 0)
-        expert = difficulty_stats.get('expert', 0)
-        
-        html_content += f"""
-            <div class="resort-card" data-status="{status}" data-name="{resort.get('name', '').lower()}">
+""")
+
+# 雪场网格和容器的结束标签（之后写入筛选索引）
+_GRID_CLOSE = minify_html("""
+        </div>
+    </div>
+""")
+
+# 筛选索引：每张卡片一项 [状态, 小写名称]，顺序与卡片一致
+_INDEX_TPL = '<script id="resorts-data" type="application/json">{payload}</script>'
+
+# 页面尾部（脚本 + 结束标签），不含任何变量
+# 筛选/搜索只读 resorts-data 索引，不逐个读取卡片属性；可见性在 requestAnimationFrame 中统一更新，且只改变发生变化的卡片
+_TAIL_HTML = minify_html("""
+    <script>
+        const RESORTS = JSON.parse(document.getElementById('resorts-data').textContent);
+        const CARDS = Array.from(document.querySelectorAll('.resort-card'));
+        const visible = CARDS.map(() => true);
+        let currentStatus = 'all';
+        let currentQuery = '';
+        let frame = 0;
+        let searchTimer = 0;
+        
+        function applyFilters() {
+            frame = 0;
+            for (let i = 0; i < CARDS.length; i++) {
+                const [status, name] = RESORTS[i];
+                const show = (currentStatus === 'all' || status === currentStatus) && name.includes(currentQuery);
+                if (show !== visible[i]) {
+                    visible[i] = show;
+                    CARDS[i].style.display = show ? '' : 'none';
+                }
+            }
+        }
+        
+        function scheduleFilters() {
+            if (!frame) {
+                frame = requestAnimationFrame(applyFilters);
+            }
+        }
+        
+        function filterResorts(status, button) {
+            // 更新按钮状态
+            document.querySelectorAll('.filter-btn').forEach(btn => btn.classList.toggle('active', btn === button));
+            currentStatus = status;
+            scheduleFilters();
+        }
+        
+        function searchResorts(query) {
+            // 输入停顿 80ms 后再筛选
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => {
+                currentQuery = query.toLowerCase();
+                scheduleFilters();
+            }, 80);
+        }
+    </script>
+</body>
+</html>
+""")
+
+
+# 雪场卡片（模块加载时定义一次，每个雪场只做一次 format_map）
+# 可选区块（雪道统计、难度分布、错误、耗时）先用下面的片段模板渲染，不需要时为空字符串
+_RESORT_TPL = minify_html("""
+            <div class="resort-card" data-status="{status}" data-name="{name_lower}">
                 <div class="resort-header">
                     <div>
-                        <div class="resort-name">{resort.get('name', 'Unknown')}</div>
+                        <div class="resort-name">{name}</div>
                         <div class="resort-meta">
-                            ID: {resort.get('resort_id', 'N/A')} | {resort.get('location', 'N/A')}
+                            ID: {resort_id} | {location}
                         </div>
                     </div>
                     <span class="status-badge {status}">{status_text}</span>
                 </div>
-"""
-        
-        if status == 'success' or status == 'skipped':
-            html_content += f"""
+                {stats_html}{difficulty_html}{error_html}{duration_html}
+            </div>
+""")
+
+_TRAILS_STATS_TPL = minify_html("""
                 <div class="trails-stats">
                     <div class="stat-item">
                         <div class="stat-label">🎿 雪道数量</div>
@@ -428,81 +484,237 @@ def generate_trails_html_report(report_data: Dict, output_file: str):
                         <div class="stat-value">{boundary_points}</div>
                     </div>
                 </div>
-"""
-            
-            # 难度分布
-            if easy > 0 or intermediate > 0 or advanced > 0 or expert > 0:
-                html_content += f"""
-                <div class="difficulty-badges">
-                    {'<span class="difficulty-badge easy">🟢 初级: ' + str(easy) + '</span>' if easy > 0 else ''}
-                    {'<span class="difficulty-badge intermediate">🔵 中级: ' + str(intermediate) + '</span>' if intermediate > 0 else ''}
-                    {'<span class="difficulty-badge advanced">⚫ 高级: ' + str(advanced) + '</span>' if advanced > 0 else ''}
-                    {'<span class="difficulty-badge expert">💎 专家: ' + str(expert) + '</span>' if expert > 0 else ''}
-                </div>
-"""
-        
-        if error:
-            html_content += f"""
+""")
+
+_DIFFICULTY_TPL = minify_html("""
+                <div class="difficulty-badges">{badges}</div>
+""")
+
+_DIFFICULTY_BADGE_TPL = '<span class="difficulty-badge {level}">{label}: {count}</span>'
+
+# 状态徽章文字
+_STATUS_TEXT = {
+    'success': '✅ 成功',
+    'failed': '❌ 失败',
+    'skipped': '⏭️ 跳过'
+}
+
+# 难度统计字段 -> (CSS 类, 标签)，按显示顺序排列
+_DIFF_TPL = {
+    'easy': ('easy', '🟢 初级'),
+    'intermediate': ('intermediate', '🔵 中级'),
+    'advanced': ('advanced', '⚫ 高级'),
+    'expert': ('expert', '💎 专家'),
+}
+
+_ERROR_TPL = minify_html("""
                 <div class="error-message">
                     ❌ {error}
                 </div>
-"""
-        
-        if duration > 0:
-            html_content += f"""
+""")
+
+_DURATION_TPL = minify_html("""
                 <div class="duration">⏱️ 耗时: {duration:.1f} 秒</div>
-"""
-        
-        html_content += """
-            </div>
-"""
+""")
+
+
+def _render_resort(resort: Dict) -> str:
+    """
+    渲染单个雪场卡片
     
-    # 添加 JavaScript 和结束标签
-    html_content += """
-        </div>
-    </div>
+    Args:
+        resort: 雪场采集结果
     
-    <script>
-        function filterResorts(status) {
-            const cards = document.querySelectorAll('.resort-card');
-            const buttons = document.querySelectorAll('.filter-btn');
-            
-            // 更新按钮状态
-            buttons.forEach(btn => btn.classList.remove('active'));
-            event.target.classList.add('active');
-            
-            // 过滤卡片
-            cards.forEach(card => {
-                if (status === 'all' || card.dataset.status === status) {
-                    card.style.display = 'block';
-                } else {
-                    card.style.display = 'none';
-                }
-            });
-        }
-        
-        function searchResorts(query) {
-            const cards = document.querySelectorAll('.resort-card');
-            const searchTerm = query.toLowerCase();
-            
-            cards.forEach(card => {
-                const name = card.dataset.name;
-                if (name.includes(searchTerm)) {
-                    card.style.display = 'block';
-                } else {
-                    card.style.display = 'none';
-                }
-            });
-        }
-    </script>
-</body>
-</html>
-"""
+    Returns:
+        卡片 HTML 片段
+    """
+    status = resort.get('status', 'failed')
+    status_text = _STATUS_TEXT.get(status, '❓ 未知')
     
-    # 写入文件
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    trails_count = resort.get('trails_count', 0)
+    boundary_points = resort.get('boundary_points', 0)
+    duration = resort.get('duration', 0)
+    error = resort.get('error', '')
     
-    print(f"[OK] HTML 报告已生成: {output_file}")
+    # 雪道难度统计
+    difficulty_stats = resort.get('difficulty_stats', {})
+    
+    name = resort.get('name') or ''
+    
+    stats_html = ''
+    difficulty_html = ''
+    if status == 'success' or status == 'skipped':
+        stats_html = _TRAILS_STATS_TPL.format(trails_count=trails_count, boundary_points=boundary_points)
+        
+        # 难度分布（只为数量大于 0 的难度生成徽章）
+        badges = [
+            _DIFFICULTY_BADGE_TPL.format(level=level, label=label, count=count)
+            for key, (level, label) in _DIFF_TPL.items()
+            if (count := difficulty_stats.get(key, 0)) > 0
+        ]
+        if badges:
+            difficulty_html = _DIFFICULTY_TPL.format(badges=''.join(badges))
+    
+    return _RESORT_TPL.format_map({
+        'status': _esc(status),
+        'status_text': status_text,
+        'name': _esc(name or 'Unknown'),
+        'name_lower': _esc(name.lower()),
+        'resort_id': _esc(resort.get('resort_id', 'N/A')),
+        'location': _esc(resort.get('location', 'N/A')),
+        'stats_html': stats_html,
+        'difficulty_html': difficulty_html,
+        'error_html': _ERROR_TPL.format(error=_esc(error)) if error else '',
+        'duration_html': _DURATION_TPL.format(duration=duration) if duration > 0 else '',
+    })
+
+
+@functools.lru_cache(maxsize=128)
+def _format_timestamp(iso: str) -> str:
+    """
+    ISO 时间戳转为 YYYY-MM-DD HH:MM:SS（同一时间戳重复生成报告时直接命中缓存）
+    
+    直接格式化整数字段，不经过 strftime
+    
+    Args:
+        iso: ISO 格式时间戳
+    
+    Returns:
+        格式化后的时间
+    
+    Raises:
+        ValueError: 不是合法的 ISO 时间戳
+    """
+    dt = datetime.fromisoformat(iso)
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+
+
+def _resort_index_json(resorts: List[Dict]) -> str:
+    """
+    生成页面内嵌的筛选索引 JSON
+    
+    Args:
+        resorts: 雪场采集结果（顺序与卡片一致）
+    
+    Returns:
+        紧凑 JSON 字符串（'<' 转义为 \\u003c，内容中不会出现 </script>）
+    """
+    index = [
+        [resort.get('status', 'failed'), (resort.get('name') or '').lower()]
+        for resort in resorts
+    ]
+    
+    if orjson is not None:
+        # orjson 直接输出紧凑的 UTF-8 bytes；报告文件以文本模式流式写入，这里解码一次
+        return orjson.dumps(index).replace(b'<', b'\\u003c').decode('utf-8')
+    
+    return json.dumps(index, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def _without_timing(data: Dict) -> Dict:
+    """去掉 _RUN_TIMING_KEYS 中的计时字段"""
+    return {key: value for key, value in data.items() if key not in _RUN_TIMING_KEYS}
 
 
+def _report_hash(report_data: Dict) -> str:
+    """
+    计算报告内容哈希（键排序后的规范 JSON + 模板版本）
+    
+    不包含生成时间和各项耗时：只有雪场结果或汇总数字变化时哈希才会变化
+    
+    Args:
+        report_data: 报告数据字典
+    
+    Returns:
+        32 位十六进制 blake2b 摘要
+    """
+    content = _without_timing(report_data)
+    content['summary'] = _without_timing(report_data.get('summary', {}))
+    content['resorts'] = [_without_timing(resort) for resort in report_data.get('resorts', [])]
+    content['template_version'] = _TEMPLATE_VERSION
+    
+    if orjson is not None:
+        payload = orjson.dumps(content, option=orjson.OPT_SORT_KEYS, default=str)
+    else:
+        payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def generate_trails_html_report(report_data: Dict, output_file: str):
+    """
+    生成雪道采集报告的 HTML 文件
+    
+    报告内容与上次生成时相同（同目录 <output_file>.hash 中的哈希一致）且文件仍存在时跳过，
+    文件内容和修改时间保持不变，S3 ETag 也不会变化；
+    跳过时页面上的生成时间和耗时仍是上一次内容变化时的值
+    
+    Args:
+        report_data: 报告数据字典
+        output_file: 输出 HTML 文件路径
+    """
+    hash_file = output_file + '.hash'
+    payload_hash = _report_hash(report_data)
+    try:
+        with open(hash_file, 'r', encoding='utf-8') as f:
+            if f.read().strip() == payload_hash and os.path.exists(output_file):
+                print(f"[SKIP] 报告内容未变化，跳过生成: {output_file}")
+                return
+    except OSError:
+        pass
+    
+    summary = report_data.get('summary', {})
+    resorts = report_data.get('resorts', [])
+    timestamp = report_data.get('timestamp', '')
+    
+    # 格式化时间戳（先检查 YYYY-MM-DD 前缀，空值或非 ISO 字符串不走异常路径）
+    formatted_time = _esc(timestamp)
+    if isinstance(timestamp, str) and len(timestamp) >= 10 and timestamp[4] == '-' and timestamp[7] == '-':
+        try:
+            formatted_time = _format_timestamp(timestamp)
+        except ValueError:
+            pass
+    
+    # 计算成功率
+    total = summary.get('total', 0)
+    success = summary.get('success', 0)
+    failed = summary.get('failed', 0)
+    skipped = summary.get('skipped', 0)
+    success_rate = (success / total * 100) if total > 0 else 0
+    failed_rate = (failed / total * 100) if total > 0 else 0
+    skipped_rate = (skipped / total * 100) if total > 0 else 0
+    
+    # 流式写入：头部、每个雪场卡片、尾部依次写入文件，不在内存中拼接整份 HTML
+    # 1 MiB 缓冲让整份报告通常一次 write 落盘；换行符固定为 \n，不做平台换行转换
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 20, newline='\n') as f:
+        f.write("".join([
+            _DOCTYPE_HEAD,
+            _TITLE_TPL.format(formatted_time=formatted_time),
+            _STATIC_CSS,
+            _SUMMARY_TEMPLATE.format(
+                formatted_time=formatted_time,
+                total=total,
+                success=success,
+                failed=failed,
+                skipped=skipped,
+                total_trails=summary.get('total_trails', 0),
+                success_rate=success_rate,
+                failed_rate=failed_rate,
+                skipped_rate=skipped_rate
+            )
+        ]))
+        
+        # 逐个生成卡片交给 writelines，不先拼成一个大字符串
+        f.writelines(_render_resort(resort) for resort in resorts)
+        
+        f.write(_GRID_CLOSE)
+        f.write(_INDEX_TPL.format(payload=_resort_index_json(resorts)))
+        f.write(_TAIL_HTML)
+    
+    # HTML 写完后再记录哈希（先写临时文件再替换，中途失败不会留下与报告不符的哈希）
+    tmp_hash_file = f"{hash_file}.{os.getpid()}.tmp"
+    with open(tmp_hash_file, 'w', encoding='utf-8') as f:
+        f.write(payload_hash)
+    os.replace(tmp_hash_file, hash_file)
+    
+    print(f"[OK] HTML 报告已生成: {output_file}")
@@ -7,15 +7,146 @@
 
 import os
 import sys
+import json
 import argparse
+import subprocess
 from pathlib import Path
+from typing import Callable, Dict, Optional
+from sqlalchemy import text
+
+# orjson 可选：本地运行环境未安装时退回标准库（两者都接受 bytes）
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 # 添加当前目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent))
 
-from collect_trails import main as collect_trails_main
+from collect_trails import run as collect_trails_run
 from db_manager import DatabaseManager
 
+# Terraform 输出缓存（tfstate 未变化时不再启动 terraform 进程）
+TF_OUTPUTS_CACHE = Path.home() / '.cache' / 'snow-api' / 'terraform_outputs.json'
+
+# 只缓存本脚本用到的输出（terraform output -json 会明文返回包括密钥在内的全部输出）
+TF_CACHED_OUTPUTS = ('rds_endpoint', 'redis_endpoint')
+
+
+def _load_cached_tf_outputs(state_path: Path) -> Optional[Dict]:
+    """
+    读取缓存的 Terraform 输出
+    
+    Args:
+        state_path: terraform.tfstate 路径
+    
+    Returns:
+        {输出名: 值}，缓存不存在或 tfstate 已变化时返回 None
+    """
+    try:
+        state_mtime = state_path.stat().st_mtime
+        with open(TF_OUTPUTS_CACHE, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if cached.get('state_path') != str(state_path.resolve()) or cached.get('state_mtime') != state_mtime:
+        return None
+    return cached.get('outputs')
+
+
+def _store_tf_outputs(state_path: Path, outputs: Dict):
+    """
+    写入 Terraform 输出缓存（先写临时文件再替换，权限 600）
+    
+    Args:
+        state_path: terraform.tfstate 路径
+        outputs: {输出名: 值}
+    """
+    try:
+        TF_OUTPUTS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = TF_OUTPUTS_CACHE.with_suffix(f'.{os.getpid()}.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({
+                'state_path': str(state_path.resolve()),
+                'state_mtime': state_path.stat().st_mtime,
+                'outputs': outputs
+            }, f)
+        os.replace(tmp_path, TF_OUTPUTS_CACHE)
+    except OSError as e:
+        print(f"⚠️  写入 Terraform 输出缓存失败: {e}")
+
+
+def start_terraform_outputs(terraform_dir: Path) -> Callable[[], Dict]:
+    """
+    开始获取 Terraform 输出，返回等待结果的函数
+    
+    一次 terraform output -json 取回全部输出；TF_CACHED_OUTPUTS 按 tfstate 的修改时间缓存，
+    state 没变时直接读缓存。未命中缓存时 terraform 在后台运行，调用方可以先做其他事情
+    （如读取 terraform.tfvars），再调用返回的函数取结果
+    
+    Args:
+        terraform_dir: terraform 目录
+    
+    Returns:
+        无参函数，调用后返回 {输出名: 值}（读缓存时只包含 TF_CACHED_OUTPUTS），
+        terraform 命令执行失败时抛出 subprocess.CalledProcessError
+    """
+    state_path = terraform_dir / 'terraform.tfstate'
+    
+    outputs = _load_cached_tf_outputs(state_path)
+    if outputs is not None:
+        print("📦 使用缓存的 Terraform 输出（tfstate 未变化）")
+        return lambda: outputs
+    
+    process = subprocess.Popen(
+        ['terraform', 'output', '-json'],
+        cwd=terraform_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, 'TF_IN_AUTOMATION': '1'}
+    )
+    
+    def wait() -> Dict:
+        stdout, stderr = process.communicate()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args, stdout, stderr)
+        
+        result = {name: output.get('value') for name, output in _json.loads(stdout).items()}
+        
+        if state_path.exists():
+            _store_tf_outputs(state_path, {name: result[name] for name in TF_CACHED_OUTPUTS if name in result})
+        
+        return result
+    
+    return wait
+
+
+def _read_db_password(tfvars_file: Path) -> Optional[str]:
+    """
+    从 terraform.tfvars 读取数据库密码
+    
+    Args:
+        tfvars_file: terraform.tfvars 路径
+    
+    Returns:
+        数据库密码，文件不存在或未配置时返回 None
+    """
+    if not tfvars_file.exists():
+        return None
+    
+    with open(tfvars_file, 'r') as f:
+        for line in f:
+            if 'db_password' in line and '=' in line:
+                return line.split('=', 1)[1].strip().strip('"')
+    return None
+
+
+def _endpoint_host(endpoint: str) -> str:
+    """从 host:port 形式的端点中取出主机名（只在第一个冒号处切分一次）"""
+    return endpoint.split(':', 1)[0]
+
 
 def setup_prod_env():
     """设置生产环境变量"""
@@ -24,63 +155,37 @@ def setup_prod_env():
     print("="*80)
     print()
     
-    # 获取 Terraform 输出
-    import subprocess
-    import json
-    
     try:
         # 切换到 terraform 目录
         terraform_dir = Path(__file__).parent / 'terraform'
         
         print("📡 从 Terraform 获取生产环境配置...")
         
-        # 获取 RDS 端点
-        result = subprocess.run(
-            ['terraform', 'output', '-json', 'rds_endpoint'],
-            cwd=terraform_dir,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        rds_endpoint = json.loads(result.stdout)
-        
-        # 获取 Redis 端点
-        result = subprocess.run(
-            ['terraform', 'output', '-json', 'redis_endpoint'],
-            cwd=terraform_dir,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        redis_endpoint = json.loads(result.stdout)
+        wait_outputs = start_terraform_outputs(terraform_dir)
+        
+        # terraform 进程运行期间读取 terraform.tfvars 中的数据库密码
+        db_password = _read_db_password(terraform_dir / 'terraform.tfvars')
+        
+        outputs = wait_outputs()
+        rds_endpoint = outputs['rds_endpoint']
+        redis_endpoint = outputs['redis_endpoint']
         
         print(f"✅ RDS 端点: {rds_endpoint}")
         print(f"✅ Redis 端点: {redis_endpoint}")
         print()
         
-        # 从 terraform.tfvars 读取数据库密码
-        tfvars_file = terraform_dir / 'terraform.tfvars'
-        db_password = None
-        
-        if tfvars_file.exists():
-            with open(tfvars_file, 'r') as f:
-                for line in f:
-                    if 'db_password' in line and '=' in line:
-                        db_password = line.split('=')[1].strip().strip('"')
-                        break
-        
         if not db_password:
             print("❌ 无法从 terraform.tfvars 读取数据库密码")
             db_password = input("请输入数据库密码: ")
         
         # 设置环境变量
-        os.environ['POSTGRES_HOST'] = rds_endpoint.split(':')[0]
+        os.environ['POSTGRES_HOST'] = _endpoint_host(rds_endpoint)
         os.environ['POSTGRES_PORT'] = '5432'
         os.environ['POSTGRES_USER'] = 'app'
         os.environ['POSTGRES_PASSWORD'] = db_password
         os.environ['POSTGRES_DB'] = 'snow'
         
-        os.environ['REDIS_HOST'] = redis_endpoint.split(':')[0]
+        os.environ['REDIS_HOST'] = _endpoint_host(redis_endpoint)
         os.environ['REDIS_PORT'] = '6379'
         os.environ['REDIS_DB'] = '0'
         
@@ -104,25 +209,31 @@ def setup_prod_env():
         return False
 
 
-def verify_connection():
-    """验证数据库连接"""
+def verify_connection() -> Optional[DatabaseManager]:
+    """
+    验证数据库连接
+    
+    Returns:
+        验证通过的数据库管理器（供后续采集复用连接池），失败返回 None
+    """
     print("🔍 验证数据库连接...")
     
     try:
         db = DatabaseManager()
         
-        # 测试查询
+        # 测试查询：SELECT 1 不扫表；雪场数取统计信息中的估算值（一次系统表查询）
         with db.engine.connect() as conn:
-            result = conn.execute("SELECT COUNT(*) FROM resorts")
-            count = result.scalar()
-            print(f"✅ 连接成功! 数据库中有 {count} 个雪场")
-            
-        db.close()
-        return True
+            conn.execute(text("SELECT 1"))
+            count = conn.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'resorts'")
+            ).scalar()
+            print(f"✅ 连接成功! 数据库中约有 {count} 个雪场")
+        
+        return db
         
     except Exception as e:
         print(f"❌ 数据库连接失败: {e}")
-        return False
+        return None
 
 
 def main():
@@ -157,7 +268,8 @@ def main():
         sys.exit(1)
     
     # 验证连接
-    if not verify_connection():
+    db = verify_connection()
+    if db is None:
         print("❌ 无法连接到生产数据库，退出")
         sys.exit(1)
     
@@ -188,19 +300,9 @@ def main():
     print("="*80)
     print()
     
-    # 准备参数
-    original_argv = sys.argv.copy()
-    sys.argv = ['collect_trails.py']
-    
-    if args.resort_id:
-        sys.argv.extend(['--resort-id', str(args.resort_id)])
-    
-    if args.limit:
-        sys.argv.extend(['--limit', str(args.limit)])
-    
     # 运行采集
     try:
-        collect_trails_main()
+        collect_trails_run(resort_id=args.resort_id, limit=args.limit, db_manager=db)
         print()
         print("="*80)
         print("✅ 生产环境雪道数据更新完成!")
@@ -215,9 +317,9 @@ def main():
         print()
         print(f"❌ 更新失败: {e}")
         sys.exit(1)
-        
+    
     finally:
-        sys.argv = original_argv
+        db.close()
 
 
 if __name__ == '__main__':
@@ -5,8 +5,21 @@
 """
 
 import boto3
+import gzip
+from botocore.config import Config as BotoConfig
 from datetime import datetime
 import os
+from html_minify import minify_html
+
+# 模块级 S3 客户端：多次调用 upload_to_s3 时复用连接
+_S3 = boto3.client(
+    's3',
+    region_name='us-west-2',
+    config=BotoConfig(
+        tcp_keepalive=True,
+        retries={'mode': 'standard', 'max_attempts': 3}
+    )
+)
 
 def generate_index_html():
     """生成报告列表主页"""
@@ -256,28 +269,50 @@ def generate_index_html():
 </body>
 </html>
 """
-    return html
+    return minify_html(html)
 
-def upload_to_s3(bucket_name='resort-data-reports'):
-    """上传主页到 S3"""
-    s3_client = boto3.client('s3', region_name='us-west-2')
+def _put_html(bucket_name: str, key: str, html: str) -> bool:
+    """
+    gzip 压缩并上传单个 HTML 页面
+    
+    Args:
+        bucket_name: S3 存储桶
+        key: 对象键
+        html: 页面内容
     
-    html = generate_index_html()
+    Returns:
+        是否上传成功
+    """
+    # 上传前 gzip 压缩（只在上传时压缩一次，浏览器 / CloudFront 按 Content-Encoding 自动解压）
+    body = gzip.compress(html.encode('utf-8'), compresslevel=9)
     
     try:
-        s3_client.put_object(
+        _S3.put_object(
             Bucket=bucket_name,
-            Key='index.html',
-            Body=html.encode('utf-8'),
-            ContentType='text/html',
-            CacheControl='max-age=300'
+            Key=key,
+            Body=body,
+            ContentEncoding='gzip',
+            ContentType='text/html; charset=utf-8',
+            CacheControl='max-age=300, public'
         )
-        print(f"✅ 主页已上传到 s3://{bucket_name}/index.html")
+        print(f"✅ 已上传到 s3://{bucket_name}/{key}")
         return True
     except Exception as e:
-        print(f"❌ 上传失败: {e}")
+        print(f"❌ 上传失败 ({key}): {e}")
         return False
 
+def upload_to_s3(bucket_name='resort-data-reports') -> bool:
+    """
+    生成报告主页并上传到 S3
+    
+    Args:
+        bucket_name: S3 存储桶
+    
+    Returns:
+        是否上传成功
+    """
+    return _put_html(bucket_name, 'index.html', generate_index_html())
+
 if __name__ == '__main__':
     print("🚀 生成并上传报告主页...")
     print("")